@@ -1,6 +1,6 @@
 {
     'name': 'Advance Fuel Station Management System',
-    'version': '17.0.0.0.0',
+    'version': '17.0.0.0.4',
     'summary': 'A complete fuel station management system offering real-time dashboards, sales processing, inventory tracking, shift operations, and financial settlements.',
     'sequence': 1,
     'images': ['static/description/banner.gif'],
@@ -18,6 +18,8 @@
         'security/fuel_security.xml',
         'security/ir.model.access.csv',
         'data/data.xml',
+        'data/job_queue_data.xml',
+        'data/petty_cash_data.xml',
         'reports/meter_reading_report_template.xml',
         'reports/shift_wise_report.xml',
         'reports/customer_outstanding_report.xml',
@@ -36,6 +38,8 @@
         'views/shift_manager.xml',
         'views/credit_sale.xml',
         'views/cash_settlement.xml',
+        'views/job_queue.xml',
+        'views/daily_fact.xml',
         'views/menu_actions.xml',
     ],
     'assets': {
@@ -58,6 +62,7 @@
             'fuel_station/static/src/css/petty_cash.css',
             'fuel_station/static/src/js/petty_cash.js',
             'fuel_station/static/src/xml/petty_cash.xml',
+            'fuel_station/static/src/js/report_print.js',
             'fuel_station/static/src/css/meter_reading.css',
             'fuel_station/static/src/js/meter_reading.js',
             'fuel_station/static/src/xml/meter_reading.xml',
@@ -1,4 +1,7 @@
 from . import meter_reading
 from . import customer_outstanding_service
 from . import account_payment
-from . import cash_settlement
\ No newline at end of file
+from . import cash_settlement
+from . import dashboard
+from . import user_screen
+from . import report_export
@@ -58,3 +58,46 @@ class AccountPayment(models.Model):
             'nozzle_summary': nozzle_summary,
             'total': total_amount,
         }
+
+    @api.model
+    def _iter_payment_mode_batches(self, start_date, end_date, journal_ids=None, batch_size=1000):
+        """
+        Yield the payment mode report rows of the range in batches, paged by
+        keyset on (date, id) so each batch is an index range scan and only
+        one batch is held in memory at a time.
+        """
+        domain = [
+            ('date', '>=', start_date),
+            ('date', '<=', end_date),
+            ('state', '=', 'posted'),
+            ('is_fuel_payment', '=', True),
+        ]
+        if journal_ids:
+            domain.append(('journal_id', 'in', journal_ids))
+
+        last = None
+        while True:
+            after = []
+            if last:
+                after = ['|', ('date', '>', last[0]), '&', ('date', '=', last[0]), ('id', '>', last[1])]
+            payments = self.search(domain + after, order='date, id', limit=batch_size)
+            if not payments:
+                return
+
+            payments.fetch(['date', 'amount', 'journal_id', 'shift_manager_id', 'nozzle_id'])
+            payments.journal_id.fetch(['name'])
+            payments.shift_manager_id.pump_id.fetch(['name'])
+            payments.nozzle_id.fetch(['name'])
+
+            yield [{
+                'date': pay.date.strftime('%d-%m-%Y') if pay.date else '',
+                'journal': pay.journal_id.name,
+                'pump': pay.shift_manager_id.pump_id.name if pay.shift_manager_id else 'N/A',
+                'nozzle': pay.nozzle_id.name if pay.nozzle_id else 'N/A',
+                'amount': round(pay.amount, 2),
+            } for pay in payments]
+
+            last = (payments[-1].date, payments[-1].id)
+            payments.invalidate_recordset()
+            if len(payments) < batch_size:
+                return
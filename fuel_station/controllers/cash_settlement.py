@@ -1,3 +1,5 @@
+from psycopg2 import errors
+
 from odoo import api, fields, models, _
 from odoo.exceptions import AccessError, UserError, ValidationError
 
@@ -38,10 +40,7 @@ class ClosingEntry(models.Model):
         # 📅 Date filter
         date = filters.get("date")
         if date:
-            domain += [
-                ("create_date", ">=", f"{date} 00:00:00"),
-                ("create_date", "<=", f"{date} 23:59:59"),
-            ]
+            domain.append(("business_date", "=", date))
 
         # Optional filters
         if filters.get("shift_ids"):
@@ -54,112 +53,73 @@ class ClosingEntry(models.Model):
             domain.append(("nozzle_id", "in", filters["nozzle_ids"]))
 
         entries = self.search(domain)
+        if not entries:
+            return []
 
         # ======================================================
-        # 🔥 CONSOLIDATION LOGIC
+        # 🔥 CONSOLIDATION LOGIC (GROUPED SQL)
         # ======================================================
+        groups = self._get_settlement_groups(entries.ids)
+
+        shifts = self.env["fuel.station.shift"].browse(
+            {g["shift_id"] for g in groups}
+        )
+        fuels = self.env["product.product"].browse(
+            {g["fuel_id"] for g in groups}
+        )
+        pumps = self.env["fuel.station.pump"].browse(
+            {pid for g in groups for pid in g["pump_ids"]}
+        )
+        nozzles = self.env["fuel.station.nozzle"].browse(
+            {nid for g in groups for nid in g["nozzle_ids"]}
+        )
+        shift_names = {s.id: s.name for s in shifts}
+        fuel_names = {f.id: f.display_name for f in fuels}
+        pump_names = {p.id: p.name for p in pumps}
+        nozzle_names = {n.id: n.name for n in nozzles}
 
         result = {}
 
-        for entry in entries:
-            shift = entry.shift_id
-            fuel = entry.fuel_id
-            price = entry.price
-
-            if not shift or not fuel or not price:
-                continue
-
-            # -------------------------
-            # SHIFT LEVEL
-            # -------------------------
-            if shift.id not in result:
-                result[shift.id] = {
-                    "shift_id": shift.id,
-                    "shift_name": shift.name,
+        for group in groups:
+            shift_id = group["shift_id"]
+
+            if shift_id not in result:
+                result[shift_id] = {
+                    "shift_id": shift_id,
+                    "shift_name": shift_names[shift_id],
                     "date": date,
-                    "rows": {},
+                    "rows": [],
                     "shift_total": 0.0,
-                    "closing_entry_ids": set(),
+                    "closing_entry_ids": [],
                 }
 
-            shift_data = result[shift.id]
-
-            shift_data["closing_entry_ids"].add(entry.id)
+            shift_data = result[shift_id]
+            shift_data["closing_entry_ids"] += group["closing_entry_ids"]
+            shift_data["shift_total"] += group["row_total"]
 
-            # -------------------------
-            # FUEL + PRICE LEVEL
-            # -------------------------
-            key = (fuel.id, price)
+            shift_data["rows"].append({
+                "fuel_id": group["fuel_id"],
+                "fuel_name": fuel_names[group["fuel_id"]],
+                "price": group["price"],
 
-            if key not in shift_data["rows"]:
-                shift_data["rows"][key] = {
-                    "fuel_id": fuel.id,
-                    "fuel_name": fuel.display_name,
-                    "price": price,
+                "pumps": list(dict.fromkeys(pump_names[p] for p in group["pump_ids"])),
+                "nozzles": list(dict.fromkeys(nozzle_names[n] for n in group["nozzle_ids"])),
 
-                    "pumps": set(),
-                    "nozzles": set(),
+                # FRONTEND-ONLY DIP ADJUSTMENT
+                "walkin_qty": group["walkin_qty"] - group["dip_qty"],
+                "walkin_amount": group["walkin_amount"] - group["dip_amount"],
 
-                    "walkin_qty": 0.0,
-                    "walkin_amount": 0.0,
+                "credit_qty": group["credit_qty"],
+                "credit_amount": group["credit_amount"],
 
-                    "dip_qty": 0.0,
-                    "dip_amount": 0.0,
+                "loyalty_qty": group["loyalty_qty"],
+                "loyalty_amount": group["loyalty_amount"],
 
-                    "credit_qty": 0.0,
-                    "credit_amount": 0.0,
-
-                    "loyalty_qty": 0.0,
-                    "loyalty_amount": 0.0,
-
-                    "row_total": 0.0,
-                }
+                "dip_qty": group["dip_qty"],
+                "dip_amount": group["dip_amount"],
 
-            row = shift_data["rows"][key]
-
-            # Track pumps & nozzles
-            if entry.pump_id:
-                row["pumps"].add(entry.pump_id.name)
-            if entry.nozzle_id:
-                row["nozzles"].add(entry.nozzle_id.name)
-
-            # -------------------------
-            # DIP ADJUSTMENT (SOURCE ONLY)
-            # -------------------------
-            if entry.dip_taken_qty:
-                row["dip_qty"] += entry.dip_taken_qty
-                row["dip_amount"] += entry.dip_taken_qty * entry.price
-
-            # -------------------------
-            # WALK-IN SALES
-            # -------------------------
-            for line in entry.walkin_ids:
-                row["walkin_qty"] += line.quantity or 0.0
-                row["walkin_amount"] += line.amount or 0.0
-
-            # FRONTEND-ONLY DIP ADJUSTMENT
-            if entry.dip_taken_qty:
-                row["walkin_qty"] -= entry.dip_taken_qty
-                row["walkin_amount"] -= entry.dip_taken_qty * entry.price
-
-            # -------------------------
-            # CREDIT SALES
-            # -------------------------
-            for line in entry.credit_ids:
-                row["credit_qty"] += line.quantity or 0.0
-                row["credit_amount"] += line.amount or 0.0
-
-            # -------------------------
-            # LOYALTY SALES
-            # -------------------------
-            for line in entry.loyalty_line_ids:
-                row["loyalty_qty"] += line.quantity or 0.0
-                row["loyalty_amount"] += line.amount or 0.0
-
-            # -------------------------
-            # TOTAL SALE (SOURCE OF TRUTH)
-            # -------------------------
-            row["row_total"] += entry.total_sale_amount or 0.0
+                "row_total": group["row_total"],
+            })
 
         # ======================================================
         # 🔢 FINALIZE TOTALS & SERIALIZE
@@ -168,56 +128,144 @@ class ClosingEntry(models.Model):
         output = []
 
         for shift_data in result.values():
-            rows = []
-            shift_total = 0.0
-
-            for row in shift_data["rows"].values():
-                row_total = row["row_total"]
-
-                shift_total += row_total
-
-                rows.append({
-                    "fuel_id": row["fuel_id"],
-                    "fuel_name": row["fuel_name"],
-                    "price": row["price"],
-
-                    "pumps": list(row["pumps"]),
-                    "nozzles": list(row["nozzles"]),
-
-                    "walkin_qty": row["walkin_qty"],
-                    "walkin_amount": row["walkin_amount"],
-
-                    "credit_qty": row["credit_qty"],
-                    "credit_amount": row["credit_amount"],
-
-                    "loyalty_qty": row["loyalty_qty"],
-                    "loyalty_amount": row["loyalty_amount"],
-
-                    "dip_qty": row["dip_qty"],
-                    "dip_amount": row["dip_amount"],
-
-                    "row_total": row_total,
-                })
+            shift_total = shift_data["shift_total"]
 
             output.append({
                 "shift_id": shift_data["shift_id"],
                 "shift_name": shift_data["shift_name"],
                 "date": shift_data["date"],
-                "rows": rows,
+                "rows": shift_data["rows"],
                 "petty_cash_balance": petty_cash,
                 "expected_amount": shift_total + petty_cash,
                 "shift_total": shift_total,
-                "closing_entry_ids": list(shift_data["closing_entry_ids"]),
+                "closing_entry_ids": shift_data["closing_entry_ids"],
             })
 
         return output
 
+    @api.model
+    def _claim_for_settlement(self, entry_ids):
+        """
+        Lock the unsettled closing entries among entry_ids and mark them
+        settled within the current transaction. Rows held by a concurrent
+        settlement make this fail fast instead of waiting, and only the
+        requested rows are locked, so other cashiers are never blocked.
+        """
+        self.flush_model(["state"])
+        try:
+            with self.env.cr.savepoint(flush=False):
+                self.env.cr.execute("""
+                    SELECT id
+                      FROM closing_entry
+                     WHERE id = ANY(%s)
+                       AND state != 'settled'
+                  ORDER BY id
+                       FOR UPDATE NOWAIT
+                """, [list(entry_ids)])
+                # Read before the savepoint is released, which ends the result set
+                ids = [row[0] for row in self.env.cr.fetchall()]
+        except errors.LockNotAvailable:
+            raise UserError(_(
+                "These closing entries are being settled by another user. "
+                "Refresh the screen and try again."
+            ))
+
+        entries = self.browse(ids)
+        entries.write({"state": "settled"})
+        return entries
+
+    def _get_settlement_groups(self, entry_ids):
+        """
+        Consolidate closing entries per (shift, fuel, price) in one query.
+        Walk-in, credit and loyalty lines are summed per closing entry
+        first so a single entry is never counted twice by the joins.
+        """
+        self.flush_model()
+        for model in ("walkin.sale.line", "credit.sale.line", "closing.loyalty.line"):
+            self.env[model].flush_model(["closing_entry_id", "quantity", "amount"])
+
+        self.env.cr.execute("""
+            WITH entry AS (
+                SELECT id, shift_id, fuel_id, price, pump_id, nozzle_id,
+                       total_sale_amount,
+                       COALESCE(dip_taken_qty, 0.0) AS dip_qty
+                  FROM closing_entry
+                 WHERE id = ANY(%(ids)s)
+                   AND shift_id IS NOT NULL
+                   AND fuel_id IS NOT NULL
+                   AND COALESCE(price, 0.0) != 0.0
+            ),
+            walkin AS (
+                SELECT closing_entry_id,
+                       SUM(COALESCE(quantity, 0.0)) AS qty,
+                       SUM(COALESCE(amount, 0.0)) AS amount
+                  FROM walkin_sale_line
+                 WHERE closing_entry_id IN (SELECT id FROM entry)
+              GROUP BY closing_entry_id
+            ),
+            credit AS (
+                SELECT closing_entry_id,
+                       SUM(COALESCE(quantity, 0.0)) AS qty,
+                       SUM(COALESCE(amount, 0.0)) AS amount
+                  FROM credit_sale_line
+                 WHERE closing_entry_id IN (SELECT id FROM entry)
+              GROUP BY closing_entry_id
+            ),
+            loyalty AS (
+                SELECT closing_entry_id,
+                       SUM(COALESCE(quantity, 0.0)) AS qty,
+                       SUM(COALESCE(amount, 0.0)) AS amount
+                  FROM closing_loyalty_line
+                 WHERE closing_entry_id IN (SELECT id FROM entry)
+              GROUP BY closing_entry_id
+            )
+            SELECT e.shift_id,
+                   e.fuel_id,
+                   e.price,
+                   ARRAY_AGG(e.id ORDER BY e.id) AS closing_entry_ids,
+                   ARRAY_REMOVE(ARRAY_AGG(DISTINCT e.pump_id), NULL) AS pump_ids,
+                   ARRAY_REMOVE(ARRAY_AGG(DISTINCT e.nozzle_id), NULL) AS nozzle_ids,
+                   SUM(e.dip_qty) AS dip_qty,
+                   SUM(e.dip_qty * e.price) AS dip_amount,
+                   SUM(COALESCE(w.qty, 0.0)) AS walkin_qty,
+                   SUM(COALESCE(w.amount, 0.0)) AS walkin_amount,
+                   SUM(COALESCE(c.qty, 0.0)) AS credit_qty,
+                   SUM(COALESCE(c.amount, 0.0)) AS credit_amount,
+                   SUM(COALESCE(l.qty, 0.0)) AS loyalty_qty,
+                   SUM(COALESCE(l.amount, 0.0)) AS loyalty_amount,
+                   SUM(COALESCE(e.total_sale_amount, 0.0)) AS row_total
+              FROM entry e
+         LEFT JOIN walkin w ON w.closing_entry_id = e.id
+         LEFT JOIN credit c ON c.closing_entry_id = e.id
+         LEFT JOIN loyalty l ON l.closing_entry_id = e.id
+          GROUP BY e.shift_id, e.fuel_id, e.price
+          ORDER BY MIN(e.id)
+        """, {"ids": list(entry_ids)})
+
+        return self.env.cr.dictfetchall()
+
     @api.model
     def action_submit_cash_settlement(self, payload):
 
         print("\n================ CASH SETTLEMENT START ================\n")
         print("Payload received:", payload)
 
+        # ------------------------------------------------
+        # IDEMPOTENCY (RETRIED / DOUBLE-CLICKED SUBMIT)
+        # ------------------------------------------------
+        idempotency_key = payload.get("idempotency_key")
+        if idempotency_key:
+            # Serialise requests carrying the same key only
+            self.env.cr.execute(
+                "SELECT pg_advisory_xact_lock(hashtext(%s))",
+                [f"cash.settlement:{idempotency_key}"],
+            )
+            existing = self.env["cash.settlement"].search(
+                [("idempotency_key", "=", idempotency_key)], limit=1
+            )
+            if existing:
+                return existing.id
+
         # ------------------------------------------------
         # EMPLOYEE RESOLUTION (ADMIN SAFE)
         # ------------------------------------------------
@@ -251,15 +299,15 @@ class ClosingEntry(models.Model):
         # ------------------------------------------------
         # CLOSING ENTRIES
         # ------------------------------------------------
-        closing_entries = self.search([
-            ("id", "in", payload["closing_entry_ids"]),
-            ("state", "!=", "settled"),
-        ])
+        closing_entries = self._claim_for_settlement(payload["closing_entry_ids"])
 
         if not closing_entries:
             raise ValidationError(_("No valid closing entries found."))
 
-        shift_total = sum(closing_entries.mapped("total_sale_amount"))
+        [(shift_total,)] = self._read_group(
+            [("id", "in", closing_entries.ids)], [], ["total_sale_amount:sum"]
+        )
+        shift_total = shift_total or 0.0
 
         print("Closing Entries:", closing_entries.ids)
         print("Shift Total (Sales):", shift_total)
@@ -273,6 +321,7 @@ class ClosingEntry(models.Model):
             "date": payload["date"],
             "expected_amount": shift_total,
             "closing_entry_ids": [(6, 0, closing_entries.ids)],
+            "idempotency_key": idempotency_key or False,
         })
 
         print("Cash Settlement Created:", settlement.id)
@@ -324,7 +373,8 @@ class ClosingEntry(models.Model):
         # ------------------------------------------------
         # PAYMENT LINES
         # ------------------------------------------------
-        PaymentLine = self.env["cash.settlement.payment.line"]
+        shift_ref = f"Shift {payload['shift_id']} | {payload['date']}"
+        payment_vals = []
 
         for line in payload["payment_lines"]:
             journal_id = int(line["journal_id"])
@@ -332,10 +382,10 @@ class ClosingEntry(models.Model):
 
             # BANK → unchanged
             if journal_id != cash_journal.id:
-                PaymentLine.create({
+                payment_vals.append({
                     "cash_settlement_id": settlement.id,
                     "journal_id": journal_id,
-                    "ref": f"Shift {payload['shift_id']} | {payload['date']}",
+                    "ref": shift_ref,
                     "amount": amount,
                     "payment_type": "shift",
                 })
@@ -343,23 +393,25 @@ class ClosingEntry(models.Model):
             # CASH → SPLIT into shift + petty
             else:
                 if shift_cash_amount > 0:
-                    PaymentLine.create({
+                    payment_vals.append({
                         "cash_settlement_id": settlement.id,
                         "journal_id": cash_journal.id,
-                        "ref": f"Shift {payload['shift_id']} | {payload['date']}",
+                        "ref": shift_ref,
                         "amount": shift_cash_amount,
                         "payment_type": "shift",
                     })
 
                 if petty_cash_amount > 0:
-                    PaymentLine.create({
+                    payment_vals.append({
                         "cash_settlement_id": settlement.id,
                         "journal_id": cash_journal.id,
-                        "ref": f"Shift {payload['shift_id']} | {payload['date']} | Petty Cash Adjustment",
+                        "ref": f"{shift_ref} | Petty Cash Adjustment",
                         "amount": petty_cash_amount,
                         "payment_type": "petty_cash",
                     })
 
+        self.env["cash.settlement.payment.line"].create(payment_vals)
+
         print("Payment lines saved")
 
         # ------------------------------------------------
@@ -371,7 +423,7 @@ class ClosingEntry(models.Model):
 
         cash_account = cash_journal.default_account_id
         company = cash_journal.company_id
-        default_customer = self.env['res.partner'].search([('is_default_customer', '=', True)])
+        default_customer = self.env['res.partner'].search([('is_default_customer', '=', True)], limit=1)
 
         if petty_cash_amount > 0:
             print(">> Creating PETTY CASH entry")
@@ -431,64 +483,64 @@ class ClosingEntry(models.Model):
         # AUDIT LINES
         # ------------------------------------------------
         print("\nCreating Audit Lines...")
+
+        # Load every sale line and the header fields copied onto the audit
+        # lines in a handful of queries instead of one per line.
+        closing_entries.fetch([
+            "pump_id", "shift_id", "shift_manager_id", "nozzle_id", "fuel_id",
+            "price", "dip_taken_qty", "dip_returned_qty",
+            "walkin_ids", "credit_ids", "loyalty_line_ids",
+        ])
+        closing_entries.walkin_ids.fetch(["quantity", "amount"])
+        closing_entries.credit_ids.fetch(["quantity", "amount", "customer_id"])
+        closing_entries.loyalty_line_ids.fetch(["quantity", "amount", "customer_id"])
+
+        audit_vals = []
+
         for entry in closing_entries:
+            entry_vals = {
+                "cash_settlement_id": settlement.id,
+                "closing_entry_id": entry.id,
+                "shift_id": entry.shift_id.id,
+                "shift_manager_id": entry.shift_manager_id.id,
+                "pump_id": entry.pump_id.id,
+                "nozzle_id": entry.nozzle_id.id,
+                "fuel_id": entry.fuel_id.id,
+                "price": entry.price,
+            }
 
             for l in entry.walkin_ids:
-                self.env["cash.settlement.line"].create({
-                    "cash_settlement_id": settlement.id,
-                    "closing_entry_id": entry.id,
-                    "pump_id": entry.pump_id.id,
-                    "customer_id":default_customer,
-                    "shift_id": entry.shift_id.id,
-                    "shift_manager_id": entry.shift_manager_id.id,
-                    "nozzle_id": entry.nozzle_id.id,
-                    "fuel_id": entry.fuel_id.id,
-                    "price": entry.price,
-                    "quantity": l.quantity,
-                    "amount": l.amount,
-                    "sale_type": "walkin",
-                    "dip_taken_qty":entry.dip_taken_qty,
-                    "dip_returned_qty":entry.dip_returned_qty,
-                })
+                audit_vals.append(dict(
+                    entry_vals,
+                    customer_id=default_customer.id,
+                    quantity=l.quantity,
+                    amount=l.amount,
+                    sale_type="walkin",
+                    dip_taken_qty=entry.dip_taken_qty,
+                    dip_returned_qty=entry.dip_returned_qty,
+                ))
 
             for l in entry.credit_ids:
-                self.env["cash.settlement.line"].create({
-                    "cash_settlement_id": settlement.id,
-                    "closing_entry_id": entry.id,
-                    "shift_id": entry.shift_id.id,
-                    "shift_manager_id": entry.shift_manager_id.id,
-                    "pump_id": entry.pump_id.id,
-                    "nozzle_id": entry.nozzle_id.id,
-                    "fuel_id": entry.fuel_id.id,
-                    "price": entry.price,
-                    "quantity": l.quantity,
-                    "customer_id": l.customer_id.id,
-                    "amount": l.amount,
-                    "sale_type": "credit",
-                })
+                audit_vals.append(dict(
+                    entry_vals,
+                    customer_id=l.customer_id.id,
+                    quantity=l.quantity,
+                    amount=l.amount,
+                    sale_type="credit",
+                ))
 
             for l in entry.loyalty_line_ids:
-                self.env["cash.settlement.line"].create({
-                    "cash_settlement_id": settlement.id,
-                    "closing_entry_id": entry.id,
-                    "shift_id": entry.shift_id.id,
-                    "shift_manager_id": entry.shift_manager_id.id,
-                    "pump_id": entry.pump_id.id,
-                    "nozzle_id": entry.nozzle_id.id,
-                    "fuel_id": entry.fuel_id.id,
-                    "price": entry.price,
-                    "quantity": l.quantity,
-                    "customer_id": l.customer_id.id,
-                    "amount": l.amount,
-                    "sale_type": "loyalty",
-                })
+                audit_vals.append(dict(
+                    entry_vals,
+                    customer_id=l.customer_id.id,
+                    quantity=l.quantity,
+                    amount=l.amount,
+                    sale_type="loyalty",
+                ))
 
-        print("Audit Lines Created")
+        self.env["cash.settlement.line"].create(audit_vals)
 
-        # ------------------------------------------------
-        # FINALIZE
-        # ------------------------------------------------
-        closing_entries.write({"state": "settled"})
+        print("Audit Lines Created")
 
         print("Settlement Submitted:", settlement.id)
         print("\n================ CASH SETTLEMENT END ==================\n")
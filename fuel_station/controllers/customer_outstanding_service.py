@@ -59,3 +59,51 @@ class ResPartner(models.Model):
                 result.append(pdata)
 
         return result
+
+    @api.model
+    def _iter_customer_outstanding_batches(self, start_date, end_date, partner_ids=None, batch_size=1000):
+        """
+        Yield one row per open invoice of the credit customers in the range,
+        in batches paged by keyset on (invoice_date, id).
+        """
+        domain = [
+            ('state', '=', 'posted'),
+            ('move_type', '=', 'out_invoice'),
+            ('invoice_date', '>=', start_date),
+            ('invoice_date', '<=', end_date),
+            ('amount_residual', '>', 0),
+            ('partner_id.is_credit_customer', '=', True),
+        ]
+        if partner_ids:
+            domain.append(('partner_id', 'in', partner_ids))
+
+        Move = self.env['account.move']
+        last = None
+        while True:
+            after = []
+            if last:
+                after = ['|', ('invoice_date', '>', last[0]), '&', ('invoice_date', '=', last[0]), ('id', '>', last[1])]
+            invoices = Move.search(domain + after, order='invoice_date, id', limit=batch_size)
+            if not invoices:
+                return
+
+            invoices.fetch([
+                'name', 'partner_id', 'invoice_date', 'invoice_date_due',
+                'amount_total', 'amount_residual', 'state', 'payment_state',
+            ])
+            invoices.partner_id.fetch(['name'])
+
+            yield [{
+                'customer': inv.partner_id.name,
+                'name': inv.name,
+                'date': inv.invoice_date.strftime('%d-%m-%Y') if inv.invoice_date else '',
+                'due': inv.invoice_date_due.strftime('%d-%m-%Y') if inv.invoice_date_due else '',
+                'total': inv.amount_total,
+                'balance': inv.amount_residual,
+                'payment_state': inv.payment_state,
+            } for inv in invoices]
+
+            last = (invoices[-1].invoice_date, invoices[-1].id)
+            invoices.invalidate_recordset()
+            if len(invoices) < batch_size:
+                return
@@ -0,0 +1,410 @@
+from odoo import api, fields, models
+from odoo.tools import SQL
+
+
+class ClosingEntry(models.Model):
+    _inherit = 'closing.entry'
+
+    @api.model
+    def get_dashboard_snapshot(self, params=None):
+        """
+        Everything the Fuel Dashboard needs on mount, computed in one
+        transaction. Each panel is also exposed through its own
+        _dashboard_* helper so the screen can refresh it alone.
+        """
+        params = params or {}
+        today = params.get('today') or fields.Date.context_today(self)
+
+        return {
+            'shifts': self._dashboard_shifts(),
+            'nozzles': self._dashboard_nozzles(),
+            'employees': self._dashboard_employees(),
+            'assignments': self._dashboard_assignments(params.get('assign_date') or today),
+            'recent_closings': self._dashboard_recent_closings(),
+            'products_stock': self._dashboard_stock_products(),
+            'fuel_pricing': self._dashboard_fuel_pricing(params.get('pricing_date') or today),
+            'fuel_sales': self._dashboard_fuel_sales(
+                params.get('fuel_sale_type') or 'all',
+                page_size=params.get('page_size') or 5,
+            ),
+            'collection': self._dashboard_collection(
+                params.get('from_date') or today,
+                params.get('to_date') or today,
+                params.get('group_by') or 'shift',
+                page_size=params.get('collection_page_size') or 5,
+            ),
+            'credit_invoices': self._dashboard_credit_invoices(
+                page_size=params.get('credit_page_size') or 5,
+            ),
+            'today_sales_amount': self._dashboard_today_sales_amount(today),
+        }
+
+    # ------------------------------------------------
+    # ASSIGNMENT GRID
+    # ------------------------------------------------
+    @api.model
+    def _dashboard_shifts(self):
+        return self.env['fuel.station.shift'].search_read(
+            [], ['name', 'start_time', 'end_time']
+        )
+
+    @api.model
+    def _dashboard_nozzles(self):
+        nozzles = self.env['fuel.station.nozzle'].search([])
+        rows = [{
+            'id': nozzle.id,
+            'name': nozzle.name or '',
+            'pump_id': nozzle.pump_id.id or None,
+            'pump_name': nozzle.pump_id.name or '',
+        } for nozzle in nozzles]
+        rows.sort(key=lambda n: (n['pump_name'], n['name']))
+        return rows
+
+    @api.model
+    def _dashboard_employees(self):
+        return self.env['hr.employee'].search_read([], ['name'])
+
+    @api.model
+    def _dashboard_assignments(self, date):
+        return self.env['fuel.shift.manager'].search_read(
+            [('assigned_date', '=', date)],
+            ['shift_id', 'employee_id', 'nozzle_id'],
+        )
+
+    @api.model
+    def _dashboard_recent_closings(self, limit=5):
+        return self.search_read(
+            [],
+            ['create_date', 'shift_id', 'pump_id', 'nozzle_id', 'start_reading', 'end_reading',
+             'opening_amount', 'closing_amount', 'employee_id', 'fuel_id'],
+            limit=limit,
+            order='create_date desc',
+        )
+
+    # ------------------------------------------------
+    # STOCK & PRICING
+    # ------------------------------------------------
+    @api.model
+    def _dashboard_stock_products(self):
+        groups = self.env['stock.quant']._read_group(
+            [
+                ('product_id.is_fuel_product', '=', True),
+                ('product_id.active', '=', True),
+                ('location_id.usage', '=', 'internal'),
+            ],
+            ['product_id', 'location_id'],
+            ['quantity:sum'],
+        )
+
+        rows = []
+        for product, location, qty in groups:
+            rows.append({
+                'id': f'{product.id}_{location.id}',
+                'product_id': product.id,
+                'product_name': product.display_name,
+                'location_id': location.id,
+                'location_name': location.display_name,
+                'qty': qty,
+                'uom': product.uom_id.name or '',
+                'price': product.list_price or 0.0,
+                'currency': product.currency_id.name or '-',
+                'stock_value': qty * (product.list_price or 0.0),
+            })
+        return rows
+
+    @api.model
+    def _dashboard_fuel_pricing(self, date):
+        return self.get_fuel_pricing_at(date)
+
+    @api.model
+    def get_fuel_pricing_at(self, date):
+        """ Price of every priced fuel in effect on `date`, from the pricing history. """
+        Pricing = self.env['fuel.pricing']
+        products = self.env['product.product'].browse(Pricing._get_priced_product_ids())
+        return [{
+            'product_id': product.id,
+            'product_name': product.display_name,
+            'price': Pricing.price_at(product, date),
+        } for product in products]
+
+    # ------------------------------------------------
+    # SALES
+    # ------------------------------------------------
+    @api.model
+    def _dashboard_fuel_sales(self, sale_type='all', page_size=5):
+        return self.get_fuel_sales_page(sale_type, page_size=page_size)
+
+    @api.model
+    def get_fuel_sales_page(self, sale_type='all', cursor=None, page_size=5):
+        """
+        One page of fuel sale orders, newest first, each with the product and
+        quantity of its first order line.
+
+        Paging is keyset based on (date_order, id): `cursor` is the
+        `next_cursor` of the previous page, so every page is an index range
+        scan (see SaleOrder.init) whatever its depth. Only orders the user
+        may read are listed: the record rules come from sale.order._search.
+        """
+        SaleOrder = self.env['sale.order']
+        SaleOrder.check_access_rights('read')
+
+        where = [SQL("so.is_fuel_sale"), SQL("so.company_id = ANY(%s)", self.env.companies.ids)]
+        if sale_type != 'all':
+            where.append(SQL("so.fuel_sale_type = %s", sale_type))
+        where.append(SQL("so.id IN %s", SaleOrder._search([('is_fuel_sale', '=', True)]).subselect()))
+        if cursor:
+            where.append(SQL(
+                "(so.date_order, so.id) < (%s::timestamp, %s)", cursor['date_order'], cursor['id'],
+            ))
+
+        SaleOrder.flush_model([
+            'is_fuel_sale', 'fuel_sale_type', 'company_id', 'date_order', 'name',
+            'partner_id', 'amount_total',
+        ])
+        self.env['sale.order.line'].flush_model(['order_id', 'sequence', 'product_id', 'product_uom_qty'])
+        self.env.cr.execute(SQL("""
+            SELECT so.id, so.name, so.date_order, so.partner_id, so.fuel_sale_type,
+                   so.amount_total::float8, line.product_id, line.product_uom_qty::float8
+              FROM sale_order so
+         LEFT JOIN LATERAL (
+                       SELECT sol.product_id, sol.product_uom_qty
+                         FROM sale_order_line sol
+                        WHERE sol.order_id = so.id
+                     ORDER BY sol.sequence, sol.id
+                        LIMIT 1
+                   ) line ON TRUE
+             WHERE %s
+          ORDER BY so.date_order DESC, so.id DESC
+             LIMIT %s
+        """, SQL(" AND ").join(where), page_size + 1))
+        rows = self.env.cr.fetchall()
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+
+        partners = self.env['res.partner'].browse({row[3] for row in rows if row[3]})
+        products = self.env['product.product'].browse({row[6] for row in rows if row[6]})
+        partner_names = dict(zip(partners.ids, partners.mapped('display_name')))
+        product_names = dict(zip(products.ids, products.mapped('display_name')))
+
+        records = [{
+            'id': order_id,
+            'name': name,
+            'date_order': date_order,
+            'partner_id': partner_id and (partner_id, partner_names[partner_id]),
+            'fuel_sale_type': fuel_sale_type,
+            'amount_total': amount_total or 0.0,
+            'product_name': product_names.get(product_id, '-'),
+            'quantity': quantity or 0.0,
+        } for order_id, name, date_order, partner_id, fuel_sale_type, amount_total, product_id, quantity in rows]
+
+        last = records[-1] if records else None
+        return {
+            'records': records,
+            'has_next': has_next,
+            'next_cursor': has_next and {
+                'date_order': fields.Datetime.to_string(last['date_order']),
+                'id': last['id'],
+            },
+        }
+
+    # ------------------------------------------------
+    # COLLECTION
+    # ------------------------------------------------
+    _COLLECTION_GROUPS = {
+        'shift': 'shift_id',
+        'nozzle': 'nozzle_id',
+        'pump': 'pump_id',
+        'fuel': 'fuel_id',
+        'employee': 'employee_id',
+    }
+
+    _COLLECTION_SORTS = {
+        'name': None,
+        'total_sales': 'litres:sum',
+        'total_amount': 'expected_amount:sum',
+        'closing_amount': 'submitted_amount:sum',
+        'entry_count': 'entry_count:sum',
+    }
+
+    @api.model
+    def _dashboard_collection(self, from_date, to_date, group_by='shift', page_size=5):
+        return self.get_collection_summary(from_date, to_date, group_by, limit=page_size)
+
+    @api.model
+    def get_collection_summary(self, from_date, to_date, group_by='shift',
+                               sort_by='name', sort_order='asc', offset=0, limit=5):
+        """
+        Litres and amounts of the closing entries between two business dates,
+        aggregated per shift, nozzle, pump, fuel or employee. Reads the
+        pre-aggregated fuel.daily.fact rows; sorting and paging happen in SQL
+        so only the visible groups reach the browser.
+        """
+        field = self._COLLECTION_GROUPS[group_by]
+        direction = 'desc' if sort_order == 'desc' else 'asc'
+        aggregate = self._COLLECTION_SORTS[sort_by] or field
+        order = f'{aggregate} {direction}, {field}'
+
+        Fact = self.env['fuel.daily.fact']
+        domain = [
+            ('date', '>=', from_date),
+            ('date', '<=', to_date),
+            ('company_id', 'in', self.env.companies.ids),
+            (field, '!=', False),
+        ]
+        groups = Fact._read_group(
+            domain,
+            [field],
+            ['litres:sum', 'expected_amount:sum', 'submitted_amount:sum', 'entry_count:sum'],
+            offset=offset,
+            limit=limit,
+            order=order,
+        )
+        [(group_count, total_sales, total_amount)] = Fact._read_group(
+            domain, [], [f'{field}:count_distinct', 'litres:sum', 'expected_amount:sum'],
+        )
+
+        return {
+            'rows': [{
+                'id': record.id,
+                'name': record.display_name,
+                'total_sales': litres or 0.0,
+                'total_amount': amount or 0.0,
+                'closing_amount': closing or 0.0,
+                'entry_count': count,
+            } for record, litres, amount, closing, count in groups],
+            'count': group_count,
+            'total_sales': total_sales or 0.0,
+            'total_amount': total_amount or 0.0,
+        }
+
+    # ------------------------------------------------
+    # CREDIT & TODAY
+    # ------------------------------------------------
+    _CREDIT_INVOICE_DOMAIN = [
+        ('move_type', '=', 'out_invoice'),
+        ('fuel_inv_type', '=', 'credit'),
+        ('payment_state', 'in', ['not_paid', 'partial']),
+        ('state', '=', 'posted'),
+    ]
+
+    @api.model
+    def get_credit_receivables_summary(self, date=None):
+        """
+        Unpaid credit fuel invoices the user may read, aggregated per
+        customer and per ageing bucket, with the grand total over all of
+        them. Ageing counts the days overdue at `date` (default: today) from
+        the due date.
+        """
+        date = date or fields.Date.context_today(self)
+        AccountMove = self.env['account.move']
+        AccountMove.check_access_rights('read')
+        # Record rules of the user, on top of the filters below
+        allowed = AccountMove._search(self._CREDIT_INVOICE_DOMAIN).subselect()
+
+        AccountMove.flush_model([
+            'move_type', 'fuel_inv_type', 'payment_state', 'state', 'company_id', 'partner_id',
+            'invoice_date', 'invoice_date_due', 'amount_total_signed', 'amount_residual_signed',
+        ])
+        self.env.cr.execute(SQL("""
+            WITH invoice AS (
+                SELECT m.partner_id,
+                       m.amount_total_signed AS total,
+                       m.amount_residual_signed AS due,
+                       %s::date - COALESCE(m.invoice_date_due, m.invoice_date) AS days
+                  FROM account_move m
+                 WHERE m.move_type = 'out_invoice'
+                   AND m.fuel_inv_type = 'credit'
+                   AND m.payment_state IN ('not_paid', 'partial')
+                   AND m.state = 'posted'
+                   AND m.company_id = ANY(%s)
+                   AND m.id IN %s
+            )
+            SELECT GROUPING(partner_id) = 1 AS is_total,
+                   partner_id,
+                   COUNT(*),
+                   COALESCE(SUM(total), 0.0)::float8,
+                   COALESCE(SUM(due), 0.0)::float8,
+                   COALESCE(SUM(due) FILTER (WHERE days <= 0), 0.0)::float8,
+                   COALESCE(SUM(due) FILTER (WHERE days BETWEEN 1 AND 30), 0.0)::float8,
+                   COALESCE(SUM(due) FILTER (WHERE days BETWEEN 31 AND 60), 0.0)::float8,
+                   COALESCE(SUM(due) FILTER (WHERE days BETWEEN 61 AND 90), 0.0)::float8,
+                   COALESCE(SUM(due) FILTER (WHERE days > 90), 0.0)::float8
+              FROM invoice
+          GROUP BY ROLLUP(partner_id)
+          ORDER BY is_total, 5 DESC
+        """, date, self.env.companies.ids, allowed))
+        rows = self.env.cr.fetchall()
+
+        partners = self.env['res.partner'].browse([row[1] for row in rows if not row[0]])
+        partner_names = dict(zip(partners.ids, partners.mapped('display_name')))
+
+        def _bucket_vals(row):
+            return {
+                'count': row[2],
+                'total_amount': row[3],
+                'due_amount': row[4],
+                'ageing': dict(zip(('current', '1_30', '31_60', '61_90', '90_plus'), row[5:])),
+            }
+
+        summary = {
+            'partners': [],
+            'total': {'count': 0, 'total_amount': 0.0, 'due_amount': 0.0,
+                      'ageing': dict.fromkeys(('current', '1_30', '31_60', '61_90', '90_plus'), 0.0)},
+        }
+        for row in rows:
+            if row[0]:
+                summary['total'] = _bucket_vals(row)
+            else:
+                summary['partners'].append({
+                    'partner_id': row[1],
+                    'partner_name': partner_names.get(row[1], ''),
+                    **_bucket_vals(row),
+                })
+        return summary
+
+    @api.model
+    def _dashboard_credit_invoices(self, page_size=5):
+        return self.get_credit_panel(page_size=page_size)
+
+    @api.model
+    def get_credit_panel(self, partner_id=None, page_size=5):
+        """ Receivables summary and the first drill-down page, in one call. """
+        return {
+            'summary': self.get_credit_receivables_summary(),
+            **self.get_credit_invoices_page(partner_id=partner_id, page_size=page_size),
+        }
+
+    @api.model
+    def get_credit_invoices_page(self, partner_id=None, page=1, page_size=5):
+        """ Drill-down page of the unpaid credit invoices, optionally of one customer. """
+        domain = list(self._CREDIT_INVOICE_DOMAIN)
+        if partner_id:
+            domain.append(('partner_id', '=', partner_id))
+
+        records = self.env['account.move'].search_read(
+            domain,
+            ['name', 'invoice_date', 'invoice_date_due', 'partner_id', 'amount_total',
+             'amount_residual_signed', 'payment_state'],
+            order='invoice_date desc, id desc',
+            limit=page_size + 1,
+            offset=(page - 1) * page_size,
+        )
+        return {
+            'records': records[:page_size],
+            'has_prev': page > 1,
+            'has_next': len(records) > page_size,
+        }
+
+    @api.model
+    def _dashboard_today_sales_amount(self, date):
+        [(amount,)] = self.env['sale.order']._read_group(
+            [
+                ('state', 'in', ['sale']),
+                ('is_fuel_sale', '=', True),
+                ('date_order', '>=', f'{date} 00:00:00'),
+                ('date_order', '<=', f'{date} 23:59:59'),
+            ],
+            [],
+            ['amount_total:sum'],
+        )
+        return amount or 0.0
@@ -1,8 +1,6 @@
-from odoo import api, models
+from odoo import api, models, tools
 from odoo import http
 from odoo.http import request
-from datetime import datetime, time
-from collections import defaultdict
 
 
 
@@ -11,141 +9,252 @@ class ClosingEntry(models.Model):
 
     @api.model
     def get_meter_readings_by_date(self, date):
+        return self._get_meter_reading_summary(date)
 
-        domain = [
-            ('create_date', '>=', f'{date} 00:00:00'),
-            ('create_date', '<=', f'{date} 23:59:59'),
-        ]
-
-        records = self.search(domain, order="pump_id, nozzle_id, start_reading")
-
-        grouped = {}
-
-        for rec in records:
-            key = (rec.pump_id.id, rec.nozzle_id.id)
-
-            start = rec.start_reading or 0.0
-            end = rec.end_reading or 0.0
-            ltrs = end - start
-            rate = rec.price or 0.0
-            amount = ltrs * rate
-
-            if key not in grouped:
-                grouped[key] = {
-                    'pump': rec.pump_id.name,
-                    'nozzle': rec.nozzle_id.name,
-                    'fuel': rec.fuel_id.name if rec.fuel_id else '',
-                    'opening': start,
-                    'closing': end,
-                    'ltrs': 0.0,
-                    'rate': rate,
-                    'amount': 0.0,
-                }
-            else:
-                grouped[key]['opening'] = min(grouped[key]['opening'], start)
-                grouped[key]['closing'] = max(grouped[key]['closing'], end)
-
-            grouped[key]['ltrs'] += ltrs
-            grouped[key]['amount'] += amount
-
-            if rate:
-                grouped[key]['rate'] = rate
-
-        # ---------------------------
-        # METER LINES (UNCHANGED)
-        # ---------------------------
-        meter_lines = list(grouped.values())
-
-        # ---------------------------
-        # TOTAL SALES (NEW)
-        # ---------------------------
+    # ------------------------------------------------
+    # METER READING SUMMARY (SCREEN + PDF)
+    # ------------------------------------------------
+    @api.model
+    def _get_meter_reading_summary(self, date):
+        """
+        Meter lines per pump/nozzle, sales per fuel and credit sales per fuel
+        of one business date, shared by the meter reading screen and its PDF.
+
+        The figures come from grouped queries cached per (companies, date,
+        version); the version changes when a closing entry or credit line of
+        that date, or the fuel of a nozzle, changes and the change commits.
+        Names are resolved after the cache so renames show up immediately.
+        """
+        company_ids = tuple(self.env.companies.ids)
+        date = str(date)
+        version = self.env['fuel.cache.version']._get_version([f'closing.entry:{date}', 'fuel.station.nozzle'])
+        if version is None:
+            meter_rows, credit_rows = self._read_meter_reading_figures(company_ids, date)
+        else:
+            meter_rows, credit_rows = self._get_meter_reading_figures(company_ids, date, version)
+
+        pumps = self.env['fuel.station.pump'].browse({row[0] for row in meter_rows if row[0]})
+        nozzles = self.env['fuel.station.nozzle'].browse({row[1] for row in meter_rows if row[1]})
+        products = self.env['product.product'].browse(
+            {row[2] for row in meter_rows if row[2]} | {row[0] for row in credit_rows if row[0]}
+        )
+        pump_names = dict(zip(pumps.ids, pumps.mapped('name')))
+        nozzle_names = dict(zip(nozzles.ids, nozzles.mapped('name')))
+        product_names = dict(zip(products.ids, products.mapped('name')))
+
+        meter_lines = []
         product_map = {}
+        for pump_id, nozzle_id, fuel_id, opening, closing, ltrs, amount, rate in meter_rows:
+            fuel = product_names.get(fuel_id, '')
+            meter_lines.append({
+                'pump': pump_names.get(pump_id, ''),
+                'nozzle': nozzle_names.get(nozzle_id, ''),
+                'fuel': fuel,
+                'opening': opening,
+                'closing': closing,
+                'ltrs': ltrs,
+                'rate': rate,
+                'amount': amount,
+            })
 
-        for line in meter_lines:
-            product = line['fuel']
-
-            if product not in product_map:
-                product_map[product] = {
-                    'product': product,
-                    'ltrs': 0.0,
-                    'rate': line['rate'],
-                    'amount': 0.0,
-                }
-
-            product_map[product]['ltrs'] += line['ltrs']
-            product_map[product]['amount'] += line['amount']
-
-        total_sales = list(product_map.values())
-
-        # ---------------------------
-        # CREDIT SALES (NEW)
-        # ---------------------------
-        credit_lines = self.env['credit.sale.line'].search([
-            ('closing_entry_id.create_date', '>=', f'{date} 00:00:00'),
-            ('closing_entry_id.create_date', '<=', f'{date} 23:59:59'),
-        ])
-
-        credit_map = {}
-
-        for line in credit_lines:
-            product = line.nozzle_id.product_id.name if line.nozzle_id and line.nozzle_id.product_id else ''
-            qty = line.quantity or 0.0
-            rate = line.price or 0.0
-            amount = line.amount or 0.0
-
-            if product not in credit_map:
-                credit_map[product] = {
-                    'product': product,
-                    'qty': 0.0,
-                    'rate': rate,
-                    'amount': 0.0,
-                }
-
-            credit_map[product]['qty'] += qty
-            credit_map[product]['amount'] += amount
-
-            if rate:
-                credit_map[product]['rate'] = rate
+            if fuel not in product_map:
+                product_map[fuel] = {'product': fuel, 'ltrs': 0.0, 'rate': rate, 'amount': 0.0}
+            product_map[fuel]['ltrs'] += ltrs
+            product_map[fuel]['amount'] += amount
 
-        credit_sales = list(credit_map.values())
+        credit_sales = [{
+            'product': product_names.get(product_id, ''),
+            'qty': qty,
+            'rate': rate,
+            'amount': amount,
+        } for product_id, qty, amount, rate in credit_rows]
 
-        # ✅ RETURN BOTH
         return {
             'meter_lines': meter_lines,
-            'total_sales': total_sales,
+            'total_sales': list(product_map.values()),
             'credit_sales': credit_sales,
         }
 
     @api.model
-    def get_shift_wise_data(self, start_date, end_date):
-        start_date = datetime.strptime(start_date, '%Y-%m-%d')
-        end_date = datetime.strptime(end_date, '%Y-%m-%d')
+    @tools.ormcache('company_ids', 'date', 'version')
+    def _get_meter_reading_figures(self, company_ids, date, version):
+        return self._read_meter_reading_figures(company_ids, date)
+
+    @api.model
+    def _read_meter_reading_figures(self, company_ids, date):
+        """
+        (meter_rows, credit_rows) of plain tuples:
+        meter: (pump_id, nozzle_id, fuel_id, opening, closing, ltrs, amount, rate)
+        credit: (product_id, qty, amount, rate)
+        The rate is the last non-zero price of the group, as on the screen.
+        """
+        self.flush_model(['pump_id', 'nozzle_id', 'fuel_id', 'start_reading', 'end_reading', 'price'])
+        self.env.cr.execute("""
+            SELECT pump_id,
+                   nozzle_id,
+                   (ARRAY_AGG(fuel_id ORDER BY COALESCE(start_reading, 0), id))[1],
+                   MIN(COALESCE(start_reading, 0)),
+                   MAX(COALESCE(end_reading, 0)),
+                   SUM(COALESCE(end_reading, 0) - COALESCE(start_reading, 0)),
+                   SUM((COALESCE(end_reading, 0) - COALESCE(start_reading, 0)) * COALESCE(price, 0))::float8,
+                   COALESCE((ARRAY_AGG(price ORDER BY COALESCE(start_reading, 0) DESC, id DESC)
+                                 FILTER (WHERE COALESCE(price, 0) <> 0))[1], 0)::float8
+              FROM closing_entry
+             WHERE business_date = %(date)s
+               AND company_id = ANY(%(company_ids)s)
+          GROUP BY pump_id, nozzle_id
+          ORDER BY pump_id, nozzle_id
+        """, {'date': date, 'company_ids': list(company_ids)})
+        meter_rows = tuple(self.env.cr.fetchall())
+
+        self.env['credit.sale.line'].flush_model(['nozzle_id', 'quantity', 'price', 'amount'])
+        self.env['fuel.station.nozzle'].flush_model(['product_id'])
+        self.env.cr.execute("""
+            SELECT n.product_id,
+                   SUM(COALESCE(l.quantity, 0)),
+                   SUM(COALESCE(l.amount, 0))::float8,
+                   COALESCE((ARRAY_AGG(l.price ORDER BY l.id DESC)
+                                 FILTER (WHERE COALESCE(l.price, 0) <> 0))[1], 0)::float8
+              FROM credit_sale_line l
+         LEFT JOIN fuel_station_nozzle n ON n.id = l.nozzle_id
+             WHERE l.business_date = %(date)s
+               AND l.company_id = ANY(%(company_ids)s)
+          GROUP BY n.product_id
+          ORDER BY MIN(l.id)
+        """, {'date': date, 'company_ids': list(company_ids)})
+        credit_rows = tuple(self.env.cr.fetchall())
+
+        return meter_rows, credit_rows
+
+    # ------------------------------------------------
+    # SHIFT WISE REPORT
+    # ------------------------------------------------
+    # Rows are sorted by shift, date, pump, nozzle and id; missing shifts,
+    # pumps and nozzles sort last, as in an ORM order on those columns.
+    _SHIFT_WISE_KEY = """
+        COALESCE(shift_id, 2147483647), business_date,
+        COALESCE(pump_id, 2147483647), COALESCE(nozzle_id, 2147483647), id
+    """
+
+    _SHIFT_WISE_FIELDS = [
+        'business_date', 'shift_id', 'pump_id', 'nozzle_id', 'fuel_id',
+        'start_reading', 'end_reading', 'total_reading', 'price',
+    ]
 
-        start_dt = datetime.combine(start_date.date(), time.min)
-        end_dt = datetime.combine(end_date.date(), time.max)
+    @api.model
+    def get_shift_wise_data(self, start_date, end_date, cursor=None, page_size=200):
+        """
+        One page of the shift wise report between two business dates.
+
+        Paging is keyset based on the report order: `cursor` is the
+        `next_cursor` of the previous page. The first page (no cursor) also
+        carries the per-shift subtotals of the whole range.
+        """
+        ids, next_cursor = self._get_shift_wise_ids(start_date, end_date, cursor, page_size)
+        result = {
+            'lines': self._get_shift_wise_rows(self.browse(ids)),
+            'has_next': bool(next_cursor),
+            'next_cursor': next_cursor,
+        }
+        if not cursor:
+            result['subtotals'] = self._get_shift_wise_subtotals(start_date, end_date)
+        return result
 
-        domain = [
-            ('create_date', '>=', start_dt),
-            ('create_date', '<=', end_dt),
+    @api.model
+    def _get_shift_wise_ids(self, start_date, end_date, cursor=None, limit=200):
+        """ (ids of the next `limit` closing entries after `cursor`, cursor of the following batch). """
+        where = [
+            "business_date BETWEEN %(start_date)s AND %(end_date)s",
+            "company_id = ANY(%(company_ids)s)",
         ]
+        args = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'company_ids': self.env.companies.ids,
+            'limit': limit + 1,
+        }
+        if cursor:
+            where.append(f"({self._SHIFT_WISE_KEY}) > %(cursor)s")
+            args['cursor'] = tuple(cursor)
+
+        self.flush_model(['business_date', 'company_id', 'shift_id', 'pump_id', 'nozzle_id'])
+        self.env.cr.execute(f"""
+            SELECT {self._SHIFT_WISE_KEY}
+              FROM closing_entry
+             WHERE {" AND ".join(where)}
+          ORDER BY {self._SHIFT_WISE_KEY}
+             LIMIT %(limit)s
+        """, args)
+        rows = self.env.cr.fetchall()
+        if len(rows) <= limit:
+            return [row[-1] for row in rows], False
+
+        rows = rows[:limit]
+        last = list(rows[-1])
+        last[1] = str(last[1])
+        return [row[-1] for row in rows], last
 
-        closings = self.search(domain, order="shift_id, pump_id")
-
-        shift_data = defaultdict(list)
-
-        for rec in closings:
-            shift_data[rec.shift_id.name].append({
-                'date': rec.create_date.strftime('%d-%m-%Y'),
-                'pump': rec.pump_id.name,
-                'nozzle': rec.nozzle_id.name,
-                'fuel': rec.fuel_id.name,
-                'start_reading': rec.start_reading,
-                'end_reading': rec.end_reading,
-                'total_reading': rec.total_reading,
-                'price': rec.price,
-                'amount': rec.total_reading * rec.price,
-            })
+    @api.model
+    def _get_shift_wise_rows(self, closings):
+        """ Report rows of `closings`, reading the batch and its related names at once. """
+        closings.fetch(self._SHIFT_WISE_FIELDS)
+        closings.shift_id.fetch(['name'])
+        closings.pump_id.fetch(['name'])
+        closings.nozzle_id.fetch(['name'])
+        closings.fuel_id.fetch(['name'])
+
+        return [{
+            'id': rec.id,
+            'shift_id': rec.shift_id.id,
+            'shift': rec.shift_id.name,
+            'date': rec.business_date.strftime('%d-%m-%Y'),
+            'pump': rec.pump_id.name,
+            'nozzle': rec.nozzle_id.name,
+            'fuel': rec.fuel_id.name,
+            'start_reading': rec.start_reading,
+            'end_reading': rec.end_reading,
+            'total_reading': rec.total_reading,
+            'price': rec.price,
+            'amount': rec.total_reading * rec.price,
+        } for rec in closings]
 
-        return dict(shift_data)
+    @api.model
+    def _iter_shift_wise_batches(self, start_date, end_date, batch_size=1000):
+        """
+        Yield the report rows of the whole range in batches of `batch_size`.
+        Each batch is fetched after the previous one by keyset and dropped
+        from the cache once yielded, so memory stays flat for any range.
+        """
+        cursor = None
+        while True:
+            ids, cursor = self._get_shift_wise_ids(start_date, end_date, cursor, batch_size)
+            if not ids:
+                return
+            closings = self.browse(ids)
+            yield self._get_shift_wise_rows(closings)
+            closings.invalidate_recordset()
+            if not cursor:
+                return
+
+    @api.model
+    def _get_shift_wise_subtotals(self, start_date, end_date):
+        """ Closings, litres and amount per shift over the range, from the daily facts. """
+        groups = self.env['fuel.daily.fact']._read_group(
+            [
+                ('date', '>=', start_date),
+                ('date', '<=', end_date),
+                ('company_id', 'in', self.env.companies.ids),
+            ],
+            ['shift_id'],
+            ['entry_count:sum', 'litres:sum', 'sales_amount:sum'],
+            order='shift_id',
+        )
+        return [{
+            'shift_id': shift.id,
+            'shift': shift.name,
+            'count': count or 0,
+            'total_reading': litres or 0.0,
+            'amount': amount or 0.0,
+        } for shift, count, litres, amount in groups]
 
 
@@ -0,0 +1,198 @@
+import csv
+import io
+import tempfile
+
+import xlsxwriter
+from werkzeug.exceptions import BadRequest
+
+from odoo import api, fields, http
+from odoo.http import content_disposition, request
+from odoo.modules.registry import Registry
+
+
+class FuelReportExport(http.Controller):
+    """
+    CSV / XLSX export of the fuel station reports.
+
+    The response body is a generator: rows are read in fixed-size batches
+    with a cursor of its own (the request cursor is closed once the handler
+    returns) and written out batch by batch, so memory stays flat whatever
+    the range. CSV bytes leave with the first batch; an XLSX file can only
+    be sent once complete, so it is built on disk in constant_memory mode
+    and then streamed in chunks.
+    """
+
+    _BATCH_SIZE = 1000
+    _CHUNK_SIZE = 64 * 1024
+
+    # report: (title, model checked for read access, [(row key, column label)])
+    _REPORTS = {
+        'meter_reading': ('Meter Reading', 'closing.entry', [
+            ('pump', 'Pump'),
+            ('nozzle', 'Nozzle'),
+            ('fuel', 'Fuel'),
+            ('opening', 'Opening'),
+            ('closing', 'Closing'),
+            ('ltrs', 'Litres'),
+            ('rate', 'Rate'),
+            ('amount', 'Amount'),
+        ]),
+        'shift_wise': ('Shift Wise Report', 'closing.entry', [
+            ('shift', 'Shift'),
+            ('date', 'Date'),
+            ('pump', 'Pump'),
+            ('nozzle', 'Nozzle'),
+            ('fuel', 'Fuel'),
+            ('start_reading', 'Start'),
+            ('end_reading', 'End'),
+            ('total_reading', 'Total'),
+            ('price', 'Price'),
+            ('amount', 'Amount'),
+        ]),
+        'payment_mode': ('Payment Mode Report', 'account.payment', [
+            ('date', 'Date'),
+            ('journal', 'Journal'),
+            ('pump', 'Pump'),
+            ('nozzle', 'Nozzle'),
+            ('amount', 'Amount'),
+        ]),
+        'customer_outstanding': ('Customer Outstanding Report', 'account.move', [
+            ('customer', 'Customer'),
+            ('name', 'Invoice'),
+            ('date', 'Date'),
+            ('due', 'Due Date'),
+            ('total', 'Total'),
+            ('balance', 'Balance'),
+            ('payment_state', 'Payment Status'),
+        ]),
+    }
+
+    _MIMETYPES = {
+        'csv': 'text/csv;charset=utf-8',
+        'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    }
+
+    @http.route('/fuel_station/export/<string:report>/<string:file_format>', type='http', auth='user', methods=['GET'])
+    def export_report(self, report, file_format, **params):
+        if report not in self._REPORTS or file_format not in self._MIMETYPES:
+            raise request.not_found()
+
+        title, model, columns = self._REPORTS[report]
+        # Fail before streaming starts, while an error page can still be returned
+        request.env[model].check_access_rights('read')
+        params = self._parse_params(report, params)
+
+        batches = self._iter_batches(
+            request.env.cr.dbname, request.env.uid, dict(request.env.context), report, params,
+        )
+        if file_format == 'csv':
+            body = self._csv_chunks(columns, batches)
+        else:
+            body = self._xlsx_chunks(title, columns, batches)
+
+        period = params.get('date') or '%s - %s' % (params.get('start_date'), params.get('end_date'))
+        return request.make_response(body, headers=[
+            ('Content-Type', self._MIMETYPES[file_format]),
+            ('Content-Disposition', content_disposition(f'{title} {period}.{file_format}')),
+        ])
+
+    def _iter_batches(self, dbname, uid, context, report, params):
+        with Registry(dbname).cursor() as cr:
+            env = api.Environment(cr, uid, context)
+            yield from getattr(self, f'_{report}_batches')(env, params)
+
+    # ------------------------------------------------
+    # PARAMETERS
+    # ------------------------------------------------
+    def _parse_params(self, report, params):
+        """ Dates and ids of the report, parsed up front: a bad value is a 400, not a cut-off file. """
+        date_keys = ['date'] if report == 'meter_reading' else ['start_date', 'end_date']
+        parsed = {}
+        for key in date_keys:
+            parsed[key] = self._date_param(params, key)
+        for key in ('journal_ids', 'partner_ids'):
+            parsed[key] = self._ids_param(params, key)
+        return parsed
+
+    @staticmethod
+    def _date_param(params, key):
+        try:
+            value = fields.Date.to_date(params.get(key))
+        except ValueError:
+            value = None
+        if not value:
+            raise BadRequest(f'Missing or invalid {key}')
+        return value
+
+    @staticmethod
+    def _ids_param(params, key):
+        try:
+            return [int(item) for item in (params.get(key) or '').split(',') if item.strip()]
+        except ValueError:
+            raise BadRequest(f'Invalid {key}')
+
+    # ------------------------------------------------
+    # ROW SOURCES
+    # ------------------------------------------------
+    def _meter_reading_batches(self, env, params):
+        yield env['closing.entry']._get_meter_reading_summary(params['date'])['meter_lines']
+
+    def _shift_wise_batches(self, env, params):
+        return env['closing.entry']._iter_shift_wise_batches(
+            params['start_date'], params['end_date'], batch_size=self._BATCH_SIZE,
+        )
+
+    def _payment_mode_batches(self, env, params):
+        return env['account.payment']._iter_payment_mode_batches(
+            params['start_date'], params['end_date'],
+            journal_ids=params['journal_ids'],
+            batch_size=self._BATCH_SIZE,
+        )
+
+    def _customer_outstanding_batches(self, env, params):
+        return env['res.partner']._iter_customer_outstanding_batches(
+            params['start_date'], params['end_date'],
+            partner_ids=params['partner_ids'],
+            batch_size=self._BATCH_SIZE,
+        )
+
+    # ------------------------------------------------
+    # WRITERS
+    # ------------------------------------------------
+    @staticmethod
+    def _cell(value):
+        return '' if value is None or value is False else value
+
+    def _csv_chunks(self, columns, batches):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        # BOM so spreadsheet tools detect UTF-8
+        buffer.write('\ufeff')
+        writer.writerow([label for __, label in columns])
+        for batch in batches:
+            writer.writerows([self._cell(row[key]) for key, __ in columns] for row in batch)
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue().encode('utf-8')
+
+    def _xlsx_chunks(self, title, columns, batches):
+        with tempfile.TemporaryFile() as file:
+            workbook = xlsxwriter.Workbook(file, {'constant_memory': True})
+            sheet = workbook.add_worksheet(title[:31])
+            header = workbook.add_format({'bold': True})
+
+            sheet.write_row(0, 0, [label for __, label in columns], header)
+            row_index = 1
+            for batch in batches:
+                for row in batch:
+                    sheet.write_row(row_index, 0, [self._cell(row[key]) for key, __ in columns])
+                    row_index += 1
+            workbook.close()
+
+            file.seek(0)
+            while chunk := file.read(self._CHUNK_SIZE):
+                yield chunk
@@ -0,0 +1,322 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from psycopg2 import errors
+
+from odoo import api, fields, models, _, Command
+from odoo.exceptions import UserError, ValidationError
+from odoo.tools import float_compare, float_is_zero
+
+
+class FuelShiftManager(models.Model):
+    _inherit = 'fuel.shift.manager'
+
+    @api.model
+    def get_attendant_shift_bundle(self, date, employee=None):
+        """
+        Shift rows of the attendant user screen for `date`, ready to render.
+
+        Admins see every attendant (or only `employee` when given), other
+        users only their own shifts. Prices, previous-shift warnings,
+        carried-forward start readings and the lines of closed shifts are
+        loaded with a fixed number of set-based queries.
+        """
+        domain = [('assigned_date', '=', date)]
+        if not self.env.user.has_group("fuel_station.group_fuel_admin"):
+            domain.append(('employee_id.user_id', '=', self.env.uid))
+        elif employee:
+            domain.append(('employee_id', '=', employee))
+
+        managers = self.search(domain)
+        managers.fetch([
+            'shift_id', 'employee_id', 'nozzle_id', 'pump_id', 'fuel_id', 'state',
+            'start_reading', 'end_reading', 'dip_test', 'dip_taken_qty', 'dip_returned_qty',
+        ])
+
+        warnings = self._get_previous_shift_warnings(managers, date)
+        open_managers = managers.filtered(lambda m: m.state != 'close' and not m.start_reading)
+        last_readings = self._get_last_closed_readings(open_managers.nozzle_id.ids, date)
+
+        closed = managers.filtered(lambda m: m.state == 'close')
+        credit_lines, loyalty_lines = self._get_closed_shift_lines(closed)
+
+        Pricing = self.env['fuel.pricing']
+
+        rows = []
+        for manager in managers:
+            start_reading = manager.start_reading
+            if manager in open_managers:
+                start_reading = last_readings.get(manager.nozzle_id.id, '')
+
+            rows.append({
+                'id': manager.id,
+                'shift_id': manager.shift_id.id,
+                'shift_name': manager.shift_id.name,
+                'employee_id': manager.employee_id.id,
+                'employee_name': manager.employee_id.name,
+                'nozzle_id': manager.nozzle_id.id,
+                'nozzle_name': manager.nozzle_id.name,
+                'pump_id': manager.pump_id.id,
+                'pump_name': manager.pump_id.name,
+                'fuel_id': manager.fuel_id.id,
+                'fuel_name': manager.fuel_id.display_name,
+                'fuel_price': Pricing.price_at(manager.fuel_id, manager._get_shift_start()) if manager.fuel_id else 0.0,
+                'dip_test': manager.dip_test,
+                'dip_taken_qty': manager.dip_taken_qty or 0.0,
+                'dip_returned_qty': manager.dip_returned_qty or 0.0,
+                'state': manager.state,
+                'start_reading': start_reading or '',
+                'end_reading': manager.end_reading or '',
+                'prev_shift_warning': warnings.get(manager.id, ''),
+            })
+
+        return {
+            'shifts': rows,
+            'credit_lines': credit_lines,
+            'loyalty_lines': loyalty_lines,
+        }
+
+    # ------------------------------------------------
+    # CLOSE SHIFT
+    # ------------------------------------------------
+    @api.model
+    def close_shift(self, payload):
+        """
+        Close an attendant shift and record its closing entry in one
+        transaction: the shift readings, the closing entry and every
+        walk-in, credit and loyalty line are written together or not at all.
+
+        payload: {
+            shift_manager_id, start_reading, end_reading,
+            dip_test, dip_taken_qty, dip_returned_qty,
+            credit_lines: [{customer_id, vehicle_no, quantity}],
+            loyalty_lines: [{customer_id, quantity}],
+        }
+        """
+        manager = self._lock_for_closing(payload.get('shift_manager_id'))
+
+        if manager.state == 'close':
+            raise UserError(_("Shift %s is already closed.", manager.display_name))
+
+        warning = self._get_previous_shift_warnings(manager, manager.assigned_date).get(manager.id)
+        if warning:
+            raise UserError(warning)
+
+        product = manager.nozzle_id.product_id
+        if not product:
+            raise UserError(_("No product linked to this nozzle."))
+        Pricing = self.env['fuel.pricing']
+        shift_start = manager._get_shift_start()
+        price = Pricing.price_at(product, shift_start)
+
+        start_reading = float(payload.get('start_reading') or 0.0)
+        end_reading = float(payload.get('end_reading') or 0.0)
+        dip_test = bool(payload.get('dip_test'))
+        dip_taken_qty = float(payload.get('dip_taken_qty') or 0.0) if dip_test else 0.0
+        dip_returned_qty = float(payload.get('dip_returned_qty') or 0.0) if dip_test else 0.0
+
+        credit_lines = [l for l in payload.get('credit_lines') or [] if float(l.get('quantity') or 0.0) > 0]
+        loyalty_lines = [l for l in payload.get('loyalty_lines') or [] if float(l.get('quantity') or 0.0) > 0]
+
+        total_qty = self._validate_close_quantities(
+            start_reading, end_reading, dip_taken_qty, dip_returned_qty, credit_lines, loyalty_lines,
+        )
+        credit_qty = sum(float(l['quantity']) for l in credit_lines)
+        loyalty_qty = sum(float(l['quantity']) for l in loyalty_lines)
+        walkin_qty = total_qty - credit_qty - loyalty_qty
+
+        manager.write({
+            'start_reading': start_reading,
+            'end_reading': end_reading,
+            'price': price,
+            'dip_test': dip_test,
+            'dip_taken_qty': dip_taken_qty,
+            'dip_returned_qty': dip_returned_qty,
+            'state': 'close',
+        })
+
+        walkin_vals = []
+        if not float_is_zero(walkin_qty, precision_digits=3) and walkin_qty > 0:
+            walkin_vals.append(Command.create({'quantity': walkin_qty, 'price': price}))
+
+        entry = self.env['closing.entry'].create({
+            'pump_id': manager.pump_id.id,
+            'shift_id': manager.shift_id.id,
+            'shift_manager_id': manager.id,
+            'nozzle_id': manager.nozzle_id.id,
+            'employee_id': manager.employee_id.id,
+            'dip_taken_qty': dip_taken_qty,
+            'dip_returned_qty': dip_returned_qty,
+            'price': price,
+            'pricing_id': Pricing.pricing_at(product, shift_start).id,
+            'start_reading': start_reading,
+            'end_reading': end_reading,
+            'walkin_ids': walkin_vals,
+            'credit_ids': [Command.create({
+                'customer_id': line.get('customer_id'),
+                'vehicle_no': line.get('vehicle_no'),
+                'quantity': float(line['quantity']),
+                'price': price,
+            }) for line in credit_lines],
+            'loyalty_line_ids': [Command.create({
+                'customer_id': line.get('customer_id'),
+                'quantity': float(line['quantity']),
+                'price': price,
+            }) for line in loyalty_lines],
+        })
+
+        return {
+            'id': entry.id,
+            'name': entry.display_name,
+            'total_sale_amount': entry.total_sale_amount,
+        }
+
+    def _get_shift_start(self):
+        """ UTC datetime the shift starts, the moment its fuel price is taken at. """
+        self.ensure_one()
+        day = self.assigned_date or fields.Date.context_today(self)
+        hours = self.shift_id.start_time or 0.0
+        return self.env['fuel.pricing']._station_datetime(day) + timedelta(hours=hours)
+
+    @api.model
+    def _lock_for_closing(self, manager_id):
+        """ Lock the shift row so two tabs cannot close the same shift twice. """
+        manager = self.browse(manager_id).exists()
+        if not manager:
+            raise UserError(_("Shift record not found."))
+        manager.check_access_rights('write')
+        manager.check_access_rule('write')
+
+        try:
+            with self.env.cr.savepoint(flush=False):
+                self.env.cr.execute(
+                    "SELECT id FROM fuel_shift_manager WHERE id = %s FOR UPDATE NOWAIT",
+                    [manager.id],
+                )
+        except errors.LockNotAvailable:
+            raise UserError(_("This shift is being closed from another session. Please reload."))
+        manager.invalidate_recordset(['state'])
+        return manager
+
+    @api.model
+    def _validate_close_quantities(self, start_reading, end_reading, dip_taken_qty,
+                                   dip_returned_qty, credit_lines, loyalty_lines):
+        """ Return the dispensed quantity, or raise when the readings or lines do not add up. """
+        if not end_reading:
+            raise ValidationError(_("End Reading is required."))
+        if end_reading < start_reading:
+            raise ValidationError(_("End Reading cannot be less than Start Reading."))
+
+        if dip_returned_qty < 0:
+            raise ValidationError(_("DIP Test: Returned quantity cannot be negative."))
+        if dip_returned_qty > dip_taken_qty:
+            raise ValidationError(_("DIP Test: Returned quantity cannot exceed taken quantity."))
+
+        total_qty = end_reading - start_reading
+        if total_qty <= 0:
+            raise ValidationError(_("Sale quantity must be greater than zero."))
+
+        for line in credit_lines + loyalty_lines:
+            if not line.get('customer_id'):
+                raise ValidationError(_("Every credit and loyalty line needs a customer."))
+
+        sold_qty = sum(float(l['quantity']) for l in credit_lines + loyalty_lines)
+        if float_compare(sold_qty, total_qty, precision_digits=3) > 0:
+            raise ValidationError(_("Credit + Loyalty quantity cannot exceed total dispensed quantity."))
+
+        return total_qty
+
+    @api.model
+    def _get_previous_shift_warnings(self, managers, date):
+        """ {manager_id: message} for rows whose previous shift on the same nozzle is still open. """
+        shifts = self.env['fuel.station.shift'].search([])
+        shift_by_seq = {shift.sequence: shift for shift in shifts}
+
+        previous = {}
+        for manager in managers:
+            seq = manager.shift_id.sequence or 0
+            if seq > 1 and seq - 1 in shift_by_seq:
+                previous[manager] = shift_by_seq[seq - 1]
+        if not previous:
+            return {}
+
+        prev_managers = self.search([
+            ('assigned_date', '=', date),
+            ('shift_id', 'in', [shift.id for shift in previous.values()]),
+            ('nozzle_id', 'in', managers.nozzle_id.ids),
+        ], order='id')
+        by_key = {}
+        for prev in prev_managers:
+            by_key.setdefault((prev.shift_id.id, prev.nozzle_id.id), prev)
+
+        warnings = {}
+        for manager, prev_shift in previous.items():
+            prev = by_key.get((prev_shift.id, manager.nozzle_id.id))
+            if prev and prev.state != 'close':
+                warnings[manager.id] = (
+                    f"Previous {prev_shift.name} for {manager.nozzle_id.name} "
+                    f"is not closed by {prev.employee_id.name}."
+                )
+        return warnings
+
+    @api.model
+    def _get_last_closed_readings(self, nozzle_ids, date):
+        """ {nozzle_id: end_reading} of the last shift closed on or before `date`. """
+        if not nozzle_ids:
+            return {}
+
+        self.flush_model(['nozzle_id', 'state', 'assigned_date', 'end_reading'])
+        self.env.cr.execute("""
+            SELECT DISTINCT ON (nozzle_id) nozzle_id, end_reading
+              FROM fuel_shift_manager
+             WHERE nozzle_id = ANY(%s)
+               AND state = 'close'
+               AND assigned_date <= %s
+          ORDER BY nozzle_id, assigned_date DESC, id DESC
+        """, [list(nozzle_ids), date])
+        return dict(self.env.cr.fetchall())
+
+    @api.model
+    def _get_closed_shift_lines(self, managers):
+        """ Credit and loyalty lines of closed shifts, keyed by shift manager id. """
+        credit_lines = defaultdict(list)
+        loyalty_lines = defaultdict(list)
+        if not managers:
+            return credit_lines, loyalty_lines
+
+        credits = self.env['credit.sale.line'].search_read(
+            [('shift_manager_id', 'in', managers.ids)],
+            ['shift_manager_id', 'customer_id', 'vehicle_no', 'quantity', 'amount'],
+        )
+        vehicles = defaultdict(list)
+        customer_ids = {line['customer_id'][0] for line in credits if line['customer_id']}
+        if customer_ids:
+            for vehicle in self.env['credit.vehicle.line'].search_read(
+                [('credit_customer_id', 'in', list(customer_ids))],
+                ['credit_customer_id', 'vehicle'],
+            ):
+                vehicles[vehicle['credit_customer_id'][0]].append({
+                    'id': vehicle['id'],
+                    'vehicle': vehicle['vehicle'],
+                })
+
+        for line in credits:
+            customer_id = line['customer_id'] and line['customer_id'][0]
+            credit_lines[line['shift_manager_id'][0]].append({
+                'customer_id': customer_id or None,
+                'vehicle_no': line['vehicle_no'] or '',
+                'quantity': line['quantity'] or 0.0,
+                'amount': line['amount'] or 0.0,
+                '_vehicles': vehicles.get(customer_id, []),
+            })
+
+        for line in self.env['closing.loyalty.line'].search_read(
+            [('shift_manager_id', 'in', managers.ids)],
+            ['shift_manager_id', 'customer_id', 'quantity'],
+        ):
+            loyalty_lines[line['shift_manager_id'][0]].append({
+                'customer_id': line['customer_id'] and line['customer_id'][0] or None,
+                'quantity': line['quantity'] or 0.0,
+            })
+
+        return credit_lines, loyalty_lines
@@ -0,0 +1,42 @@
+from odoo.tools import sql
+
+
+def migrate(cr, version):
+    """
+    Backfill closing.entry.business_date and its copies on the sale line
+    tables in SQL before the registry loads, so the ORM finds the columns
+    already filled and skips recomputing every historical closing.
+    """
+    if not version:
+        return
+
+    sql.create_column(cr, 'closing_entry', 'business_date', 'date')
+
+    # Assigned shift date first, else the closing time in the station timezone
+    cr.execute("""
+        UPDATE closing_entry ce
+           SET business_date = COALESCE(
+                   (SELECT sm.assigned_date
+                      FROM fuel_shift_manager sm
+                     WHERE sm.id = ce.shift_manager_id),
+                   (ce.create_date AT TIME ZONE 'UTC' AT TIME ZONE COALESCE(
+                       (SELECT p.tz
+                          FROM res_company c
+                          JOIN res_partner p ON p.id = c.partner_id
+                         WHERE c.id = ce.company_id),
+                       'UTC'
+                   ))::date
+               )
+         WHERE ce.business_date IS NULL
+    """)
+
+    for table in ('walkin_sale_line', 'credit_sale_line', 'closing_loyalty_line'):
+        sql.create_column(cr, table, 'business_date', 'date')
+        sql.create_column(cr, table, 'shift_id', 'int4')
+        cr.execute(f"""
+            UPDATE {table} line
+               SET business_date = ce.business_date,
+                   shift_id = ce.shift_id
+              FROM closing_entry ce
+             WHERE ce.id = line.closing_entry_id
+        """)
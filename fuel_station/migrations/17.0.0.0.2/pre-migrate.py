@@ -0,0 +1,27 @@
+from odoo.tools import sql
+
+
+def migrate(cr, version):
+    """
+    closing.entry.total_sale_amount becomes a stored compute. Create the
+    column and fill it for existing rows in one statement, using the same
+    formula as _compute_total_sale_amount:
+    (walk-in qty + loyalty qty - DIP taken) * price.
+    """
+    if not version:
+        return
+
+    sql.create_column(cr, 'closing_entry', 'total_sale_amount', 'numeric')
+
+    cr.execute("""
+        UPDATE closing_entry ce
+           SET total_sale_amount = (
+                   COALESCE((SELECT SUM(w.quantity)
+                               FROM walkin_sale_line w
+                              WHERE w.closing_entry_id = ce.id), 0.0)
+                 + COALESCE((SELECT SUM(l.quantity)
+                               FROM closing_loyalty_line l
+                              WHERE l.closing_entry_id = ce.id), 0.0)
+                 - COALESCE(ce.dip_taken_qty, 0.0)
+               ) * COALESCE(ce.price, 0.0)
+    """)
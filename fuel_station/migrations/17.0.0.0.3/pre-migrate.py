@@ -0,0 +1,39 @@
+from odoo.tools import sql
+
+
+def migrate(cr, version):
+    """
+    fuel.pricing gets an activation datetime and an applied state. Existing
+    pricings activate at the start of their pricing date in the station
+    timezone (the main company's), and those already in the past count as
+    applied, as the daily cron did before.
+    """
+    if not version:
+        return
+
+    sql.create_column(cr, 'fuel_pricing', 'activation_datetime', 'timestamp')
+    sql.create_column(cr, 'fuel_pricing', 'state', 'varchar')
+    sql.create_column(cr, 'fuel_pricing', 'applied_at', 'timestamp')
+
+    cr.execute("""
+        SELECT p.tz
+          FROM res_company c
+          JOIN res_partner p ON p.id = c.partner_id
+      ORDER BY c.sequence, c.id
+         LIMIT 1
+    """)
+    row = cr.fetchone()
+    tz = row and row[0] or 'UTC'
+
+    cr.execute("""
+        UPDATE fuel_pricing
+           SET activation_datetime = (pricing_date::timestamp AT TIME ZONE %s) AT TIME ZONE 'UTC'
+         WHERE pricing_date IS NOT NULL
+    """, [tz])
+    cr.execute("""
+        UPDATE fuel_pricing
+           SET state = CASE WHEN activation_datetime <= now() AT TIME ZONE 'UTC'
+                            THEN 'applied' ELSE 'scheduled' END,
+               applied_at = CASE WHEN activation_datetime <= now() AT TIME ZONE 'UTC'
+                                 THEN activation_datetime END
+    """)
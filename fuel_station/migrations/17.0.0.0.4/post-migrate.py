@@ -0,0 +1,10 @@
+from odoo import SUPERUSER_ID, api
+
+
+def migrate(cr, version):
+    """ Fill the new fuel.daily.fact table from the existing closing entries. """
+    if not version:
+        return
+
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['fuel.daily.fact']._rebuild()
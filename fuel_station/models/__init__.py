@@ -12,4 +12,8 @@ from . import res_config
 from . import tank
 from . import fuel_pricing
 from . import account
-from . import cash_settlement
\ No newline at end of file
+from . import cash_settlement
+from . import job_queue
+from . import report_render
+from . import petty_cash
+from . import daily_fact
@@ -1,7 +1,11 @@
 from odoo import api, fields, models, _
 
 class AccountPayment(models.Model):
-    _inherit = "account.payment"
+    _name = "account.payment"
+    _inherit = ["account.payment", "fuel.cache.version.mixin"]
+
+    # Fields of the payment itself; the ones of its move go through the move
+    _cache_version_fields = ('is_fuel_payment', 'shift_manager_id', 'nozzle_id')
 
     is_fuel_payment = fields.Boolean(string="Fuel Payment")
     is_petty_cash = fields.Boolean(string="Petty Cash Payment")
@@ -12,15 +16,20 @@ class AccountPayment(models.Model):
         string="Cash Settlement",
         readonly=True,
         copy=False,
+        index=True,
     )
 
+    def _get_cache_version_names(self):
+        return self.move_id._get_cache_version_names()
+
 
 class AccountMove(models.Model):
-    _inherit = "account.move"
+    _name = "account.move"
+    _inherit = ["account.move", "fuel.cache.version.mixin"]
 
     is_fuel_invoice = fields.Boolean(string="Fuel Invoice")
     fuel_inv_type = fields.Selection([('walk', 'Walk-In'), ('credit', 'Credit Sale'), ('loyalty', 'Loyalty')],
-                                      string='Fuel Invoice Type')
+                                      string='Fuel Invoice Type', index=True)
     shift_manager_id = fields.Many2one('fuel.shift.manager', string="Shift Manager")
     nozzle_id = fields.Many2one('fuel.station.nozzle', string="Nozzle")
     settlement_id = fields.Many2one(
@@ -28,4 +37,41 @@ class AccountMove(models.Model):
         string="Cash Settlement",
         readonly=True,
         copy=False,
+        index=True,
     )
+
+    def _post(self, soft=True):
+        posted = super()._post(soft=soft)
+        self.env['fuel.petty.cash.snapshot']._apply_move_lines(posted.line_ids)
+        return posted
+
+    def button_draft(self):
+        posted_lines = self.filtered(lambda m: m.state == 'posted').line_ids
+        res = super().button_draft()
+        self.env['fuel.petty.cash.snapshot']._apply_move_lines(posted_lines, sign=-1)
+        return res
+
+    def _get_cache_version_names(self):
+        """ Accounting data of the cached reports is versioned per accounting and invoice date. """
+        return {
+            f'account.move:{date}'
+            for date in self.mapped('date') + self.mapped('invoice_date')
+            if date
+        }
+
+
+class AccountPartialReconcile(models.Model):
+    _name = "account.partial.reconcile"
+    _inherit = ["account.partial.reconcile", "fuel.cache.version.mixin"]
+
+    def _get_cache_version_names(self):
+        # Reconciling changes the residual of both moves
+        return (self.debit_move_id.move_id | self.credit_move_id.move_id)._get_cache_version_names()
+
+
+class AccountJournal(models.Model):
+    _name = "account.journal"
+    _inherit = ["account.journal", "fuel.cache.version.mixin"]
+
+    # Journal names printed on the cached payment mode PDFs
+    _cache_version_fields = ('name',)
@@ -1,3 +1,5 @@
+from markupsafe import Markup
+
 from odoo import api, fields, models, _
 from odoo.exceptions import ValidationError
 
@@ -7,6 +9,10 @@ class CashSettlement(models.Model):
     _description = "Cash Settlement"
     _inherit = ["mail.thread", "mail.activity.mixin"]
     _order = "date desc, id desc"
+    _sql_constraints = [
+        ('idempotency_key_uniq', 'unique(idempotency_key)',
+         'A cash settlement was already submitted for this request.'),
+    ]
 
     name = fields.Char(
         string="Name",
@@ -74,6 +80,13 @@ class CashSettlement(models.Model):
         readonly=True,
     )
 
+    idempotency_key = fields.Char(
+        string="Submission Key",
+        readonly=True,
+        copy=False,
+        help="Key sent by the cash settlement screen so a retried submit returns this settlement.",
+    )
+
     line_ids = fields.One2many(
         "cash.settlement.line",
         "cash_settlement_id",
@@ -107,6 +120,24 @@ class CashSettlement(models.Model):
         string="Payments"
     )
 
+    job_ids = fields.One2many(
+        "fuel.station.job",
+        "settlement_id",
+        string="Background Jobs",
+        readonly=True,
+    )
+
+    posting_state = fields.Selection(
+        [
+            ("pending", "Queued"),
+            ("running", "Running"),
+            ("done", "Done"),
+            ("failed", "Failed"),
+        ],
+        string="Posting Status",
+        compute="_compute_posting_state",
+    )
+
     @api.depends("shift_id", "date")
     def _compute_name(self):
         for rec in self:
@@ -116,23 +147,48 @@ class CashSettlement(models.Model):
                 rec.name = "Cash Settlement"
 
     def _compute_counts(self):
-        SaleOrder = self.env['sale.order']
-        AccountMove = self.env['account.move']
-        AccountPayment = self.env['account.payment']
+        def count_by_settlement(model, domain=()):
+            groups = self.env[model]._read_group(
+                [('settlement_id', 'in', self.ids), *domain],
+                ['settlement_id'],
+                ['__count'],
+            )
+            return {settlement.id: count for settlement, count in groups}
+
+        sale_counts = count_by_settlement('sale.order')
+        invoice_counts = count_by_settlement(
+            'account.move',
+            [('move_type', 'in', ('out_invoice', 'out_refund'))],
+        )
+        payment_counts = count_by_settlement('account.payment')
 
         for rec in self:
-            rec.sale_order_count = SaleOrder.search_count([
-                ('settlement_id', '=', rec.id)
-            ])
+            rec.sale_order_count = sale_counts.get(rec.id, 0)
+            rec.invoice_count = invoice_counts.get(rec.id, 0)
+            rec.payment_count = payment_counts.get(rec.id, 0)
 
-            rec.invoice_count = AccountMove.search_count([
-                ('settlement_id', '=', rec.id),
-                ('move_type', 'in', ('out_invoice', 'out_refund')),
-            ])
+    @api.depends("job_ids.state")
+    def _compute_posting_state(self):
+        for rec in self:
+            # Jobs queued by other users count too
+            last_job = rec.sudo().job_ids.sorted("id")[-1:]
+            rec.posting_state = last_job.state or False
 
-            rec.payment_count = AccountPayment.search_count([
-                ('settlement_id', '=', rec.id),
-            ])
+    def action_enqueue_sale_order(self):
+        """
+        Queue order creation, picking validation, invoicing and
+        reconciliation for the cron workers instead of running them
+        inside the request.
+        """
+        Job = self.env["fuel.station.job"]
+        for settlement in self:
+            if settlement.state == "submitted" or settlement.posting_state in ("pending", "running"):
+                continue
+            Job._enqueue(
+                "settlement_posting",
+                _("Post %s", settlement.name),
+                settlement_id=settlement.id,
+            )
 
     def action_view_sale_orders(self):
         self.ensure_one()
@@ -180,9 +236,16 @@ class CashSettlement(models.Model):
         Create Sale Orders from Cash Settlement Lines
         Uses customer_id as partner
         Passes dip_taken_qty and dip_returned_qty to Sale Order
+        All orders of a settlement are created and confirmed as one batch
         """
 
-        SaleOrder = self.env["sale.order"]
+        SaleOrder = self.env["sale.order"].with_context(from_fuel_station=True)
+
+        auto_confirm = self.env['ir.config_parameter'].sudo().get_param(
+            'fuel_station.auto_confirm_sale'
+        ) in ('True', 'true', True)
+
+        failed = []
 
         for settlement in self:
 
@@ -191,85 +254,108 @@ class CashSettlement(models.Model):
             if not settlement.line_ids:
                 raise ValidationError(_("No settlement lines to create sale orders."))
 
-            # ------------------------------------------------
-            # GROUP SETTLEMENT LINES
-            # ------------------------------------------------
-            grouped = {}
+            orders = SaleOrder.create(settlement._prepare_sale_order_vals_list())
 
-            for line in settlement.line_ids:
+            if auto_confirm and orders:
+                failures = orders._action_confirm_fuel_batch()
+                if failures:
+                    settlement._log_sale_order_failures(failures)
+                    failed.append(settlement.name)
 
-                if not line.customer_id:
-                    raise ValidationError(
-                        _("Customer missing on settlement line %s") % line.id
-                    )
-
-                key = (
-                    line.sale_type,
-                    line.customer_id.id,
-                    line.fuel_id.id,
-                    line.nozzle_id.id,
-                    line.shift_manager_id.id,
-                )
+        self.state = "submitted"
 
-                grouped.setdefault(key, {
-                    "quantity": 0.0,
-                    "dip_taken": 0.0,
-                    "dip_returned": 0.0,
-                    "price": line.price,
-                })
-
-                grouped[key]["quantity"] += line.quantity
-                grouped[key]["dip_taken"] += line.dip_taken_qty or 0.0
-                grouped[key]["dip_returned"] += line.dip_returned_qty or 0.0
-
-            # ------------------------------------------------
-            # CREATE SALE ORDERS
-            # ------------------------------------------------
-            for (
-                    sale_type,
-                    partner_id,
-                    product_id,
-                    nozzle_id,
-                    shift_manager_id,
-            ), data in grouped.items():
-
-                qty = data["quantity"]
-                if qty <= 0:
-                    continue
+        if failed:
+            return {
+                'type': 'ir.actions.client',
+                'tag': 'display_notification',
+                'params': {
+                    'type': 'warning',
+                    'title': _("Some sale orders were not confirmed"),
+                    'message': _("See the chatter of: %s", ", ".join(failed)),
+                    'next': {'type': 'ir.actions.act_window_close'},
+                },
+            }
+
+    def _prepare_sale_order_vals_list(self):
+        self.ensure_one()
 
-                if sale_type == "walkin":
-                    fuel_sale_type = "walk"
-                elif sale_type == "credit":
-                    fuel_sale_type = "credit"
-                else:
-                    fuel_sale_type = "loyalty"
-
-                order_vals = {
-                    "partner_id": partner_id,
-                    "user_id": self.env.uid,
-                    "is_fuel_sale": True,
-                    "fuel_sale_type": fuel_sale_type,
-                    "settlement_id": settlement.id,
-                    "shift_manager_id": shift_manager_id,
-                    "nozzle_id": nozzle_id,
-                    "dip_taken_qty": data["dip_taken"],
-                    "dip_returned_qty": data["dip_returned"],
-                    "order_line": [(0, 0, {
-                        "product_id": product_id,
-                        "product_uom_qty": qty,
-                        "price_unit": data["price"],
-                    })],
-                }
+        # ------------------------------------------------
+        # GROUP SETTLEMENT LINES
+        # ------------------------------------------------
+        grouped = {}
 
-                auto_confirm = self.env['ir.config_parameter'].sudo().get_param(
-                    'fuel_station.auto_confirm_sale'
-                ) in ('True', 'true', True)
+        for line in self.line_ids:
 
-                order = SaleOrder.with_context(from_fuel_station=True).create(order_vals)
+            if not line.customer_id:
+                raise ValidationError(
+                    _("Customer missing on settlement line %s") % line.id
+                )
 
-                if auto_confirm:
-                    order.action_confirm()
-        self.state = "submitted"
+            key = (
+                line.sale_type,
+                line.customer_id.id,
+                line.fuel_id.id,
+                line.nozzle_id.id,
+                line.shift_manager_id.id,
+            )
+
+            grouped.setdefault(key, {
+                "quantity": 0.0,
+                "dip_taken": 0.0,
+                "dip_returned": 0.0,
+                "price": line.price,
+            })
+
+            grouped[key]["quantity"] += line.quantity
+            grouped[key]["dip_taken"] += line.dip_taken_qty or 0.0
+            grouped[key]["dip_returned"] += line.dip_returned_qty or 0.0
+
+        # ------------------------------------------------
+        # SALE ORDER VALUES
+        # ------------------------------------------------
+        fuel_sale_types = {"walkin": "walk", "credit": "credit"}
+        vals_list = []
+
+        for (
+                sale_type,
+                partner_id,
+                product_id,
+                nozzle_id,
+                shift_manager_id,
+        ), data in grouped.items():
+
+            qty = data["quantity"]
+            if qty <= 0:
+                continue
+
+            vals_list.append({
+                "partner_id": partner_id,
+                "user_id": self.env.uid,
+                "is_fuel_sale": True,
+                "fuel_sale_type": fuel_sale_types.get(sale_type, "loyalty"),
+                "settlement_id": self.id,
+                "shift_manager_id": shift_manager_id,
+                "nozzle_id": nozzle_id,
+                "dip_taken_qty": data["dip_taken"],
+                "dip_returned_qty": data["dip_returned"],
+                "order_line": [(0, 0, {
+                    "product_id": product_id,
+                    "product_uom_qty": qty,
+                    "price_unit": data["price"],
+                })],
+            })
+
+        return vals_list
+
+    def _log_sale_order_failures(self, failures):
+        self.ensure_one()
+        lines = Markup().join(
+            Markup("<li>%s (%s): %s</li>") % (order.name, order.partner_id.display_name, error)
+            for order, error in failures.items()
+        )
+        self.message_post(body=Markup(
+            "<p>%s</p><ul>%s</ul>"
+        ) % (_("These sale orders could not be confirmed and were left in draft:"), lines))
 
     def _create_and_post_payments(self):
         AccountPayment = self.env["account.payment"]
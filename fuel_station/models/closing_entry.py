@@ -4,7 +4,7 @@ from odoo import api, fields, models, _
 class ClosingEntry(models.Model):
     _name = 'closing.entry'
     _description = "Closing Entry"
-    _inherit = ["mail.thread", "mail.activity.mixin"]
+    _inherit = ["mail.thread", "mail.activity.mixin", "fuel.cache.version.mixin"]
 
     name = fields.Char(string="Name", tracking=True)
     company_id = fields.Many2one('res.company', string="Company", default=lambda self: self.env.company, tracking=True)
@@ -20,8 +20,14 @@ class ClosingEntry(models.Model):
         store=True,
         readonly=True, tracking=True
     )
-    employee_id = fields.Many2one('hr.employee', string="Employee", tracking=True)
+    employee_id = fields.Many2one('hr.employee', string="Employee", index=True, tracking=True)
     price = fields.Monetary(string="Sold Price", tracking=True)
+    pricing_id = fields.Many2one(
+        'fuel.pricing',
+        string="Price Version",
+        readonly=True,
+        help="Fuel pricing in effect when the shift started, the source of the sold price."
+    )
     start_reading = fields.Float(string="Start Reading", tracking=True)
     end_reading = fields.Float(string="End Reading", tracking=True)
     total_reading = fields.Float(
@@ -29,8 +35,8 @@ class ClosingEntry(models.Model):
         compute="_compute_total_reading",
         store=True, tracking=True
     )
-    total_sale_amount = fields.Monetary(string="Total Sales Amount To Get", compute="_compute_total_sale_amount", tracking=True)
-    state = fields.Selection([('open', 'Open'), ('settled', 'Settled')], string='State', default='open', tracking=True)
+    total_sale_amount = fields.Monetary(string="Total Sales Amount To Get", compute="_compute_total_sale_amount", store=True, tracking=True)
+    state = fields.Selection([('open', 'Open'), ('settled', 'Settled')], string='State', default='open', index=True, tracking=True)
 
 
     @api.depends('start_reading', 'end_reading')
@@ -53,6 +59,28 @@ class ClosingEntry(models.Model):
         store=True, tracking=True
     )
     create_date = fields.Datetime(string="Closed On", tracking=True)
+    business_date = fields.Date(
+        string="Business Date",
+        compute="_compute_business_date",
+        store=True,
+        index=True,
+        tracking=True,
+        help="Station-local date the closing belongs to. Reports filter on this column.",
+    )
+
+    @api.depends('shift_manager_id.assigned_date', 'create_date', 'company_id')
+    def _compute_business_date(self):
+        for rec in self:
+            if rec.shift_manager_id.assigned_date:
+                rec.business_date = rec.shift_manager_id.assigned_date
+                continue
+
+            # Fall back to the closing time in the station's timezone
+            tz = rec.company_id.partner_id.tz or self.env.user.tz or 'UTC'
+            rec.business_date = fields.Date.context_today(
+                rec.with_context(tz=tz),
+                timestamp=rec.create_date or fields.Datetime.now(),
+            )
 
     credit_ids = fields.One2many('credit.sale.line', 'closing_entry_id', string='Credit Details', tracking=True)
     walkin_ids = fields.One2many('walkin.sale.line', 'closing_entry_id', string='Walk-in Details', tracking=True)
@@ -113,7 +141,7 @@ class ClosingEntry(models.Model):
         for rec in self:
             rec.walkin_total_amount = sum(rec.walkin_ids.mapped('amount'))
 
-    @api.depends('walkin_ids.quantity','credit_ids.quantity','loyalty_line_ids.quantity')
+    @api.depends('walkin_ids.quantity', 'loyalty_line_ids.quantity', 'dip_taken_qty', 'price')
     def _compute_total_sale_amount(self):
         for rec in self:
             walkin_total_qty = sum(rec.walkin_ids.mapped('quantity'))
@@ -121,16 +149,86 @@ class ClosingEntry(models.Model):
             total_qty = walkin_total_qty + loyalty_total_qty - (rec.dip_taken_qty or 0.0)
             rec.total_sale_amount = total_qty * rec.price
 
+    def _get_cache_version_names(self):
+        """ Closing figures are cached per business date. """
+        return {f'closing.entry:{date}' for date in self.mapped('business_date') if date}
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        # Lines created along are covered by the refresh of their entries
+        records = super(ClosingEntry, self.with_context(skip_daily_fact_refresh=True)).create(vals_list)
+        Fact = self.env['fuel.daily.fact']
+        Fact._refresh(Fact._get_keys(records))
+        return records.with_context(self.env.context)
+
+    def write(self, vals):
+        Fact = self.env['fuel.daily.fact']
+        if not Fact._SOURCE_FIELDS & set(vals):
+            return super().write(vals)
+
+        # Facts of the slices the entries leave and of the ones they join
+        keys = Fact._get_keys(self)
+        res = super(ClosingEntry, self.with_context(skip_daily_fact_refresh=True)).write(vals)
+        Fact._refresh(keys | Fact._get_keys(self))
+        return res
+
+    def unlink(self):
+        Fact = self.env['fuel.daily.fact']
+        keys = Fact._get_keys(self)
+        res = super().unlink()
+        Fact._refresh(keys)
+        return res
+
+
+class ClosingEntryLineMixin(models.AbstractModel):
+    """ Keeps the daily facts in step with sale and payment lines edited on their own. """
+    _name = 'closing.entry.line.mixin'
+    _description = 'Closing Entry Line Mixin'
+
+    # Line fields the facts (or the entry totals they read) are computed from
+    _FACT_FIELDS = {'closing_entry_id', 'quantity', 'price', 'amount'}
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        if not self.env.context.get('skip_daily_fact_refresh'):
+            Fact = self.env['fuel.daily.fact']
+            Fact._refresh(Fact._get_keys(records.closing_entry_id))
+        return records
+
+    def write(self, vals):
+        if self.env.context.get('skip_daily_fact_refresh') or not self._FACT_FIELDS & set(vals):
+            return super().write(vals)
+
+        # A line moved to another entry changes the slices of both
+        Fact = self.env['fuel.daily.fact']
+        keys = Fact._get_keys(self.closing_entry_id)
+        res = super().write(vals)
+        Fact._refresh(keys | Fact._get_keys(self.closing_entry_id))
+        return res
+
+    def unlink(self):
+        if self.env.context.get('skip_daily_fact_refresh'):
+            return super().unlink()
+
+        Fact = self.env['fuel.daily.fact']
+        keys = Fact._get_keys(self.closing_entry_id)
+        res = super().unlink()
+        Fact._refresh(keys)
+        return res
+
 
 class WalkinSaleLine(models.Model):
     _name = 'walkin.sale.line'
+    _inherit = ['closing.entry.line.mixin']
     _description = 'Walkin Sale Line'
 
     closing_entry_id = fields.Many2one(
         'closing.entry',
         string='Closing Entry',
         required=True,
-        ondelete='cascade'
+        ondelete='cascade',
+        index=True,
     )
 
     company_id = fields.Many2one(
@@ -158,6 +256,21 @@ class WalkinSaleLine(models.Model):
         store=True
     )
 
+    business_date = fields.Date(
+        related='closing_entry_id.business_date',
+        string="Business Date",
+        store=True,
+        index=True
+    )
+
+    shift_id = fields.Many2one(
+        'fuel.station.shift',
+        related='closing_entry_id.shift_id',
+        string="Station Shift",
+        store=True,
+        index=True
+    )
+
     price = fields.Monetary(string="Sold Price")
     quantity = fields.Float(string="Qty", default=0.0, tracking=True)
     amount = fields.Monetary(
@@ -187,13 +300,15 @@ class WalkinSaleLine(models.Model):
 
 class CreditSaleLine(models.Model):
     _name = 'credit.sale.line'
+    _inherit = ['closing.entry.line.mixin', 'fuel.cache.version.mixin']
     _description = 'Credit Sale Line'
 
     closing_entry_id = fields.Many2one(
         'closing.entry',
         string='Closing Entry',
         required=True,
-        ondelete='cascade'
+        ondelete='cascade',
+        index=True,
     )
 
     company_id = fields.Many2one(
@@ -232,6 +347,21 @@ class CreditSaleLine(models.Model):
         store=True
     )
 
+    business_date = fields.Date(
+        related='closing_entry_id.business_date',
+        string="Business Date",
+        store=True,
+        index=True
+    )
+
+    shift_id = fields.Many2one(
+        'fuel.station.shift',
+        related='closing_entry_id.shift_id',
+        string="Station Shift",
+        store=True,
+        index=True
+    )
+
     vehicle_no = fields.Char(string="Vehicle No")
     price = fields.Monetary(string="Sold Price")
     quantity = fields.Float(string="Qty", default=0.0)
@@ -256,9 +386,14 @@ class CreditSaleLine(models.Model):
 
             rec.amount = price
 
+    def _get_cache_version_names(self):
+        # Credit sales are part of the closing figures of their entry's day
+        return self.closing_entry_id._get_cache_version_names()
+
 
 class ClosingLoyaltyLine(models.Model):
     _name = "closing.loyalty.line"
+    _inherit = ["closing.entry.line.mixin"]
 
     company_id = fields.Many2one(
         'res.company',
@@ -275,7 +410,8 @@ class ClosingLoyaltyLine(models.Model):
         "closing.entry",
         string="Closing Entry",
         required=True,
-        ondelete="cascade"
+        ondelete="cascade",
+        index=True,
     )
 
     shift_manager_id = fields.Many2one(
@@ -292,6 +428,21 @@ class ClosingLoyaltyLine(models.Model):
         store=True
     )
 
+    business_date = fields.Date(
+        related='closing_entry_id.business_date',
+        string="Business Date",
+        store=True,
+        index=True
+    )
+
+    shift_id = fields.Many2one(
+        'fuel.station.shift',
+        related='closing_entry_id.shift_id',
+        string="Station Shift",
+        store=True,
+        index=True
+    )
+
     customer_id = fields.Many2one(
         'res.partner',
         string="Loyalty Customer",
@@ -323,6 +474,7 @@ class ClosingLoyaltyLine(models.Model):
 
 class ClosingPaymentLine(models.Model):
     _name = "closing.payment.line"
+    _inherit = ["closing.entry.line.mixin"]
     _description = "Shift Closing Payment Split"
     _order = "id"
 
@@ -341,7 +493,8 @@ class ClosingPaymentLine(models.Model):
         "closing.entry",
         string="Closing Entry",
         required=True,
-        ondelete="cascade"
+        ondelete="cascade",
+        index=True,
     )
 
     journal_id = fields.Many2one(
@@ -3,7 +3,11 @@ from odoo.exceptions import ValidationError
 
 
 class ResPartner(models.Model):
-    _inherit = "res.partner"
+    _name = "res.partner"
+    _inherit = ["res.partner", "fuel.cache.version.mixin"]
+
+    # Customers listed on the cached outstanding report PDFs
+    _cache_version_fields = ('name', 'is_credit_customer')
 
     is_credit_customer = fields.Boolean(string="Credit Customer", default=False)
     is_loyalty_customer = fields.Boolean(string="Loyalty Customer", default=False)
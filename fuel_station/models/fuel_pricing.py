@@ -1,9 +1,20 @@
-from odoo import models, fields, api
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+import pytz
+
+from odoo import models, fields, api, tools
 
 
 class FuelPricing(models.Model):
     _name = "fuel.pricing"
+    _inherit = ["fuel.cache.version.mixin"]
     _description = "Fuel Pricing"
+    _order = "activation_datetime desc, id desc"
+
+    # Fields read by the price history
+    _cache_version_fields = ('pricing_date', 'activation_datetime', 'line_ids')
 
     name = fields.Char(
         string="Reference",
@@ -12,8 +23,28 @@ class FuelPricing(models.Model):
     )
     pricing_date = fields.Date(
         string="Date",
-        default=fields.Date.today
+        default=fields.Date.today,
+        index=True
+    )
+    activation_datetime = fields.Datetime(
+        string="Effective From",
+        compute="_compute_activation_datetime",
+        store=True,
+        readonly=False,
+        precompute=True,
+        index=True,
+        help="Moment the prices take effect. Defaults to the start of the pricing date at the station."
     )
+    state = fields.Selection(
+        [('scheduled', 'Scheduled'), ('applied', 'Applied')],
+        string="Status",
+        default='scheduled',
+        required=True,
+        readonly=True,
+        copy=False,
+        index=True
+    )
+    applied_at = fields.Datetime(string="Applied On", readonly=True, copy=False)
 
     line_ids = fields.One2many(
         'fuel.pricing.line',
@@ -21,82 +52,222 @@ class FuelPricing(models.Model):
         string="Fuel Prices"
     )
 
+    @api.depends('pricing_date')
+    def _compute_activation_datetime(self):
+        for pricing in self:
+            if pricing.pricing_date:
+                pricing.activation_datetime = self._station_datetime(pricing.pricing_date)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records._schedule_activation()
+        return records
+
+    def write(self, vals):
+        if {'pricing_date', 'activation_datetime', 'line_ids'} & set(vals):
+            # The new prices have to be (re)applied at their activation
+            vals = dict(vals, state='scheduled', applied_at=False)
+        res = super().write(vals)
+
+        if vals.get('state') == 'scheduled':
+            self._schedule_activation()
+        return res
+
+    def _reschedule(self):
+        """ Have the prices of applied pricings applied again, e.g. after a line change. """
+        applied = self.filtered(lambda p: p.state == 'applied')
+        if applied:
+            applied.write({'state': 'scheduled', 'applied_at': False})
+
+    # ------------------------------------------------
+    # ACTIVATION
+    # ------------------------------------------------
     @api.model
-    def create(self, vals):
-        print("CREATE called with vals:", vals)
+    def _station_datetime(self, day, at=time.min):
+        """ UTC naive datetime of the station-local time `at` on `day`. """
+        tz = pytz.timezone(self.env.company.partner_id.tz or self.env.user.tz or 'UTC')
+        local = tz.localize(datetime.combine(day, at))
+        return local.astimezone(pytz.utc).replace(tzinfo=None)
 
-        record = super().create(vals)
+    def _schedule_activation(self):
+        """ Apply what is already due and wake the activation cron at each future activation. """
+        now = fields.Datetime.now()
+        if any(p.activation_datetime and p.activation_datetime <= now for p in self):
+            self._activate_due_pricings()
 
-        print("Created pricing:", record.id, "date:", record.pricing_date)
+        upcoming = [p.activation_datetime for p in self if p.activation_datetime and p.activation_datetime > now]
+        cron = self.env.ref('fuel_station.fuel_pricing_apply_today_cron', raise_if_not_found=False)
+        if cron and upcoming:
+            cron.sudo()._trigger(at=upcoming)
 
-        record._apply_today_pricing()
-        return record
+    @api.model
+    def _cron_activate_pricings(self):
+        self._activate_due_pricings()
 
-    def write(self, vals):
-        print("WRITE called on IDs:", self.ids, "vals:", vals)
+        # Safety net in case a trigger was lost: wake up for the next one too
+        upcoming = self.search([('state', '=', 'scheduled'), ('activation_datetime', '>', fields.Datetime.now())],
+                               order='activation_datetime', limit=1)
+        if upcoming:
+            self.env.ref('fuel_station.fuel_pricing_apply_today_cron').sudo()._trigger(
+                at=upcoming.activation_datetime)
 
-        res = super().write(vals)
+    @api.model
+    def _activate_due_pricings(self):
+        """
+        Apply every scheduled pricing whose activation has passed, including
+        ones missed while the server was down. Products get the price now in
+        effect according to the history, written once per distinct price.
+        """
+        now = fields.Datetime.now()
+        due = self.search([('state', '=', 'scheduled'), ('activation_datetime', '<=', now)])
+        if not due:
+            return
 
-        self._apply_today_pricing()
-        return res
+        products_by_price = defaultdict(lambda: self.env['product.product'])
+        for product in due.line_ids.product_id:
+            products_by_price[self.price_at(product, now)] |= product
 
-    def _apply_today_pricing(self):
-        today = fields.Date.today()
-        print("Apply pricing check. Today:", today)
+        for price, products in products_by_price.items():
+            products.write({'lst_price': price})
+
+        due.write({'state': 'applied', 'applied_at': now})
+
+    # ------------------------------------------------
+    # PRICE HISTORY
+    # ------------------------------------------------
+    @api.model
+    def price_at(self, product, when=None):
+        """
+        Price of `product` (record or id) in effect at `when` (UTC datetime,
+        or date meaning the end of that station day; default: now), from the
+        pricing history. Falls back to the product list price when no
+        pricing applies yet.
+        """
+        pricing_id, price = self._lookup_history(product, when)
+        if not pricing_id:
+            return self.env['product.product'].browse(int(product)).list_price or 0.0
+        return price
+
+    @api.model
+    def pricing_at(self, product, when=None):
+        """ The fuel.pricing version in effect for `product` at `when`. """
+        return self.browse(self._lookup_history(product, when)[0])
+
+    @api.model
+    def prices_at(self, products, when=None):
+        """ {product_id: price} for several products at the same moment. """
+        return {product.id: self.price_at(product, when) for product in products}
+
+    @api.model
+    def _lookup_history(self, product, when):
+        when = when or fields.Datetime.now()
+        if isinstance(when, str):
+            when = fields.Datetime.to_datetime(when) if len(when) > 10 else fields.Date.to_date(when)
+        if not isinstance(when, datetime) and isinstance(when, date):
+            when = self._station_datetime(when + timedelta(days=1)) - timedelta(microseconds=1)
+
+        moments, pricing_ids, prices = self._get_price_history(int(product))
+        index = bisect_right(moments, when)
+        if not index:
+            return False, 0.0
+        return pricing_ids[index - 1], prices[index - 1]
+
+    @api.model
+    def _get_price_history(self, product_id):
+        """
+        (activation datetimes, pricing ids, prices) of every pricing of the
+        product, sorted so _lookup_history can bisect. When several pricings
+        activate at the same moment the last one created wins. Cached per
+        pricing version, which changes with any pricing or pricing line.
+        """
+        version = self.env['fuel.cache.version']._get_version(['fuel.pricing'])
+        if version is None:
+            return self._read_price_history(product_id)
+        return self._get_cached_price_history(product_id, version)
+
+    @api.model
+    @tools.ormcache('product_id', 'version')
+    def _get_cached_price_history(self, product_id, version):
+        return self._read_price_history(product_id)
+
+    @api.model
+    def _read_price_history(self, product_id):
+        self.env['fuel.pricing.line'].flush_model(['pricing_id', 'product_id', 'price'])
+        self.flush_model(['activation_datetime'])
+        self.env.cr.execute("""
+            SELECT DISTINCT ON (p.activation_datetime) p.activation_datetime, p.id, l.price
+              FROM fuel_pricing_line l
+              JOIN fuel_pricing p ON p.id = l.pricing_id
+             WHERE l.product_id = %s
+               AND p.activation_datetime IS NOT NULL
+          ORDER BY p.activation_datetime, p.id DESC, l.id DESC
+        """, [product_id])
+        rows = self.env.cr.fetchall()
+        return tuple(zip(*rows)) if rows else ((), (), ())
+
+    @api.model
+    def _get_priced_product_ids(self):
+        """ Products that appear in at least one pricing, in name order. """
+        version = self.env['fuel.cache.version']._get_version(['fuel.pricing', 'product.template'])
+        if version is None:
+            return self._read_priced_product_ids()
+        return self._get_cached_priced_product_ids(version)
+
+    @api.model
+    @tools.ormcache('version')
+    def _get_cached_priced_product_ids(self, version):
+        return self._read_priced_product_ids()
+
+    @api.model
+    def _read_priced_product_ids(self):
+        groups = self.env['fuel.pricing.line']._read_group([], ['product_id'])
+        products = self.env['product.product'].concat(*(product for product, in groups))
+        return tuple(products.sorted('display_name').ids)
 
-        for pricing in self:
-            print("Checking pricing:", pricing.id, "date:", pricing.pricing_date)
-
-            if pricing.pricing_date == today:
-                print("Date matches today. Applying prices.")
-
-                for line in pricing.line_ids:
-                    print(
-                        "Updating product:",
-                        line.product_id.id,
-                        "price:",
-                        line.price
-                    )
-
-                    line.product_id.write({
-                        'lst_price': line.price
-                    })
-            else:
-                print("Date does not match. Skipping.")
-
-    def apply_today_pricing_cron(self):
-        today = fields.Date.today()
-        print("Cron running. Today:", today)
-
-        pricings = self.search([('pricing_date', '=', today)])
-        print("Pricings found:", pricings.ids)
-
-        for pricing in pricings:
-            for line in pricing.line_ids:
-                print(
-                    "Cron updating product:",
-                    line.product_id.id,
-                    "price:",
-                    line.price
-                )
-
-                line.product_id.write({
-                    'lst_price': line.price
-                })
 
 class FuelPricingLine(models.Model):
     _name = "fuel.pricing.line"
+    _inherit = ["fuel.cache.version.mixin"]
     _description = "Fuel Pricing Line"
 
+    _cache_version_fields = ('pricing_id', 'product_id', 'price')
+
     pricing_id = fields.Many2one(
         'fuel.pricing',
-        ondelete='cascade'
+        ondelete='cascade',
+        index=True
     )
 
     product_id = fields.Many2one(
         'product.product',
         string="Fuel Product",
-        required=True
+        required=True,
+        index=True
     )
 
     price = fields.Float(string="Price", required=True)
+
+    def _get_cache_version_names(self):
+        return {"fuel.pricing"} if self else set()
+
+    # Lines edited outside the pricing form have to be applied again too
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        lines.pricing_id._reschedule()
+        return lines
+
+    def write(self, vals):
+        if not {'pricing_id', 'product_id', 'price'} & set(vals):
+            return super().write(vals)
+        pricings = self.pricing_id
+        res = super().write(vals)
+        (pricings | self.pricing_id)._reschedule()
+        return res
+
+    def unlink(self):
+        pricings = self.pricing_id
+        res = super().unlink()
+        pricings.exists()._reschedule()
+        return res
@@ -1,14 +1,15 @@
 from odoo import api, fields, models, _
-from odoo.exceptions import ValidationError
+from odoo.exceptions import UserError, ValidationError
 from odoo.tools.float_utils import float_is_zero
+from odoo.tools.sql import create_index
 
 
 class SaleOrder(models.Model):
     _inherit = "sale.order"
 
-    is_fuel_sale = fields.Boolean(string="Fuel Sale")
+    is_fuel_sale = fields.Boolean(string="Fuel Sale", index=True)
     fuel_sale_type = fields.Selection([('walk', 'Walk-In'), ('credit', 'Credit Sale'), ('loyalty', 'Loyalty')],
-                                      string='Fuel Sale Type')
+                                      string='Fuel Sale Type', index=True)
     shift_manager_id = fields.Many2one('fuel.shift.manager', string="Shift Manager")
     nozzle_id = fields.Many2one('fuel.station.nozzle', string="Nozzle")
 
@@ -22,14 +23,55 @@ class SaleOrder(models.Model):
         index=True,
     )
 
-    @api.model
-    def create(self, vals):
+    def init(self):
+        super().init()
+        # Keyset pagination of the dashboard fuel sales panel
+        create_index(
+            self._cr,
+            'sale_order_fuel_sale_date_idx',
+            self._table,
+            ['date_order DESC', 'id DESC'],
+            where='is_fuel_sale',
+        )
+        create_index(
+            self._cr,
+            'sale_order_fuel_sale_type_date_idx',
+            self._table,
+            ['fuel_sale_type', 'date_order DESC', 'id DESC'],
+            where='is_fuel_sale',
+        )
+
+    @api.model_create_multi
+    def create(self, vals_list):
         if self.env.context.get("from_fuel_station"):
-            if not vals.get("name") or vals.get("name") == "/":
-                vals["name"] = self.env["ir.sequence"].next_by_code(
-                    "sale.order.fuel"
-                ) or "/"
-        return super().create(vals)
+            for vals in vals_list:
+                if not vals.get("name") or vals.get("name") == "/":
+                    vals["name"] = self.env["ir.sequence"].next_by_code(
+                        "sale.order.fuel"
+                    ) or "/"
+        return super().create(vals_list)
+
+    def _action_confirm_fuel_batch(self):
+        """
+        Confirm all orders with a single action_confirm call. If the batch
+        fails, confirm them one by one so a bad order does not block the
+        others. Returns {order: error message} for the orders left draft.
+        """
+        try:
+            with self.env.cr.savepoint():
+                self.action_confirm()
+            return {}
+        except UserError:
+            pass
+
+        failures = {}
+        for order in self:
+            try:
+                with self.env.cr.savepoint():
+                    order.action_confirm()
+            except UserError as e:
+                failures[order] = str(e)
+        return failures
 
     def action_confirm(self):
         res = super().action_confirm()
@@ -226,16 +268,16 @@ class SaleOrder(models.Model):
 class SaleOrderLine(models.Model):
     _inherit = "sale.order.line"
 
-    @api.model
-    def create(self, vals):
-        product_id = vals.get('product_id')
-        if product_id:
-            product = self.env['product.product'].browse(product_id)
-            if product.is_fuel_product and not self.env.context.get('from_fuel_station'):
+    @api.model_create_multi
+    def create(self, vals_list):
+        if not self.env.context.get('from_fuel_station'):
+            product_ids = [vals['product_id'] for vals in vals_list if vals.get('product_id')]
+            products = self.env['product.product'].browse(product_ids)
+            if any(products.mapped('is_fuel_product')):
                 raise ValidationError(
                     "Fuel products can only be sold through Fuel Sales / Fuel Station."
                 )
-        return super().create(vals)
+        return super().create(vals_list)
 
     @api.onchange('product_id')
     def _onchange_product_id_fuel(self):
@@ -20,19 +20,10 @@ class HrEmployee(models.Model):
 
     @api.depends('coa_id')
     def _compute_petty_cash_balance(self):
-        MoveLine = self.env['account.move.line']
+        # Latest daily snapshot + posted lines since, for all employees at once
+        balances = self.env['fuel.petty.cash.snapshot']._get_balances(self)
         for employee in self:
-            if not employee.coa_id:
-                employee.petty_cash_balance = 0.0
-                continue
-
-            lines = MoveLine.search([
-                ('account_id', '=', employee.coa_id.id),
-                ('move_id.state', '=', 'posted'),
-            ])
-
-            balance = sum(lines.mapped('debit')) - sum(lines.mapped('credit'))
-            employee.petty_cash_balance = balance
+            employee.petty_cash_balance = balances.get(employee.id, 0.0)
 
     def create_petty_cash_account(self):
         for employee in self:
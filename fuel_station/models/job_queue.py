@@ -0,0 +1,273 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+
+class FuelStationJob(models.Model):
+    """
+    Database-backed job queue processed by the fuel station ir.cron workers.
+
+    Every worker claims the oldest runnable job with FOR UPDATE SKIP LOCKED,
+    so several cron workers drain the queue in parallel without an outside
+    broker. Jobs of the same settlement never run at the same time.
+    """
+    _name = "fuel.station.job"
+    _description = "Fuel Station Background Job"
+    _order = "id desc"
+
+    # A job left "running" longer than this is assumed to belong to a dead worker
+    _STALE_AFTER = timedelta(hours=1)
+    # Time one cron run keeps claiming jobs before handing back its worker
+    _RUN_BUDGET = timedelta(minutes=5)
+
+    name = fields.Char(string="Name", required=True)
+
+    job_type = fields.Selection(
+        [
+            ("settlement_posting", "Settlement Posting"),
+            ("report_render", "Report Rendering"),
+        ],
+        string="Job Type",
+        required=True,
+    )
+
+    state = fields.Selection(
+        [
+            ("pending", "Pending"),
+            ("running", "Running"),
+            ("done", "Done"),
+            ("failed", "Failed"),
+        ],
+        string="State",
+        default="pending",
+        required=True,
+        index=True,
+    )
+
+    settlement_id = fields.Many2one(
+        "cash.settlement",
+        string="Cash Settlement",
+        ondelete="cascade",
+        index=True,
+    )
+
+    report_name = fields.Char(string="Report", readonly=True)
+    report_data = fields.Json(string="Report Parameters", readonly=True)
+    report_key = fields.Char(
+        string="Report Cache Key",
+        readonly=True,
+        index=True,
+        help="Report, parameters and data version the job was queued for.",
+    )
+    attachment_id = fields.Many2one(
+        "ir.attachment",
+        string="Rendered Report",
+        readonly=True,
+        ondelete="set null",
+    )
+
+    # Set by _enqueue only: the job runs as this user in this company
+    user_id = fields.Many2one(
+        "res.users",
+        string="Requested By",
+        default=lambda self: self.env.user,
+        required=True,
+        readonly=True,
+    )
+
+    company_id = fields.Many2one(
+        "res.company",
+        string="Company",
+        default=lambda self: self.env.company,
+        required=True,
+        readonly=True,
+    )
+
+    eta = fields.Datetime(
+        string="Run After",
+        default=fields.Datetime.now,
+        required=True,
+    )
+    date_started = fields.Datetime(string="Started On", readonly=True)
+    date_done = fields.Datetime(string="Finished On", readonly=True)
+
+    retry_count = fields.Integer(string="Retries", default=0, readonly=True)
+    max_retries = fields.Integer(string="Max Retries", default=3)
+    error_log = fields.Text(string="Error Log", readonly=True)
+
+    def init(self):
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS fuel_station_job_pending_idx
+                ON fuel_station_job (eta, id)
+             WHERE state = 'pending'
+        """)
+
+    # ------------------------------------------------
+    # ENQUEUE
+    # ------------------------------------------------
+    @api.model
+    def _enqueue(self, job_type, name, **vals):
+        """
+        Queue a job that will run as the current user in the current company.
+        Users only read their own jobs, so the job is created as superuser;
+        a settlement never gets a second pending or running job, whoever
+        queued the first one.
+        """
+        if vals.get("settlement_id"):
+            active = self.sudo().search([
+                ("settlement_id", "=", vals["settlement_id"]),
+                ("state", "in", ("pending", "running")),
+            ], limit=1)
+            if active:
+                return self.browse(active.id)
+
+        job = self._create_job(job_type, name, **vals)
+        self._trigger_workers()
+        return job
+
+    @api.model
+    def _create_job(self, job_type, name, **vals):
+        job = self.sudo().create({
+            **vals,
+            "job_type": job_type,
+            "name": name,
+            "user_id": self.env.uid,
+            "company_id": self.env.company.id,
+        })
+        return self.browse(job.id)
+
+    @api.model
+    def _trigger_workers(self):
+        crons = self.env["ir.cron"].sudo().search([
+            ("code", "=", "model._cron_run_jobs()"),
+            ("model_id.model", "=", self._name),
+        ])
+        for cron in crons:
+            cron._trigger()
+
+    def action_retry(self):
+        self.filtered(lambda j: j.state == "failed").write({
+            "state": "pending",
+            "retry_count": 0,
+            "eta": fields.Datetime.now(),
+        })
+        self._trigger_workers()
+
+    # ------------------------------------------------
+    # WORKER
+    # ------------------------------------------------
+    @api.model
+    def _cron_run_jobs(self):
+        self._requeue_stale_jobs()
+
+        deadline = fields.Datetime.now() + self._RUN_BUDGET
+        while fields.Datetime.now() < deadline:
+            job = self._claim_next_job()
+            if not job:
+                break
+            job._execute()
+
+    @api.model
+    def _requeue_stale_jobs(self):
+        stale = self.search([
+            ("state", "=", "running"),
+            ("date_started", "<", fields.Datetime.now() - self._STALE_AFTER),
+        ])
+        if stale:
+            stale.write({"state": "pending", "eta": fields.Datetime.now()})
+            self.env.cr.commit()
+
+    @api.model
+    def _claim_next_job(self):
+        self.env.cr.execute("""
+            SELECT job.id
+              FROM fuel_station_job job
+             WHERE job.state = 'pending'
+               AND job.eta <= %s
+               AND NOT EXISTS (
+                       SELECT 1
+                         FROM fuel_station_job other
+                        WHERE other.state = 'running'
+                          AND other.settlement_id = job.settlement_id
+                   )
+          ORDER BY job.eta, job.id
+             LIMIT 1
+               FOR UPDATE SKIP LOCKED
+        """, [fields.Datetime.now()])
+        row = self.env.cr.fetchone()
+        if not row:
+            return self.browse()
+
+        job = self.browse(row[0])
+        job.write({"state": "running", "date_started": fields.Datetime.now()})
+        # Publish the claim so other workers and the settlement form see it
+        self.env.cr.commit()
+        return job
+
+    def _execute(self):
+        self.ensure_one()
+        try:
+            with self.env.cr.savepoint():
+                self._perform()
+        except Exception as e:
+            _logger.exception("Fuel station job %s failed", self.id)
+            self._mark_failed(e)
+        else:
+            self.write({"state": "done", "date_done": fields.Datetime.now()})
+        self.env.cr.commit()
+
+    def _perform(self):
+        env_self = self.with_user(self.user_id).with_company(self.company_id)
+        method = getattr(env_self, f"_perform_{self.job_type}")
+        method()
+
+    def _perform_settlement_posting(self):
+        settlement = self.settlement_id
+        if not settlement:
+            raise UserError(_("Settlement posting job has no settlement."))
+
+        # Serialize jobs of the same settlement: a second one waits here for
+        # the first to commit, then sees its orders and payments below
+        self.env.cr.execute("SELECT id FROM cash_settlement WHERE id = %s FOR UPDATE", [settlement.id])
+        settlement.invalidate_recordset(["state"])
+        already_posted = (
+            settlement.state == "submitted"
+            or self.env["sale.order"].search_count([("settlement_id", "=", settlement.id)], limit=1)
+            or self.env["account.payment"].search_count([("settlement_id", "=", settlement.id)], limit=1)
+        )
+        if already_posted:
+            _logger.info("Settlement %s is already posted, job %s skipped", settlement.id, self.id)
+            return
+        settlement.create_sale_order()
+
+    def _perform_report_render(self):
+        if not self.report_name:
+            raise UserError(_("Report rendering job has no report."))
+
+        attachment = self._render_report_attachment()
+        self.env["bus.bus"]._sendone(self.user_id.partner_id, "fuel_station.report_ready", {
+            "title": _("Report ready"),
+            "message": _("%s is ready.", attachment.name),
+            "url": self._get_report_url(attachment),
+        })
+
+    def _mark_failed(self, error):
+        retry_count = self.retry_count + 1
+        log = "[%s] attempt %s\n%s" % (
+            fields.Datetime.now(), retry_count,
+            "".join(traceback.format_exception(error)),
+        )
+        vals = {
+            "retry_count": retry_count,
+            "error_log": "\n".join(filter(None, [self.error_log, log])),
+        }
+        if retry_count < self.max_retries:
+            vals.update(state="pending", eta=fields.Datetime.now() + timedelta(minutes=5 * retry_count))
+        else:
+            vals.update(state="failed", date_done=fields.Datetime.now())
+        self.write(vals)
@@ -2,8 +2,12 @@ from odoo import api, fields, models, _
 
 class FuelStationNozzle(models.Model):
     _name = 'fuel.station.nozzle'
+    _inherit = ['fuel.cache.version.mixin']
     _description = "Fuel Station Nozzle"
 
+    # The meter reading figures group credit sales by nozzle fuel
+    _cache_version_fields = ('name', 'product_id')
+
     name = fields.Char(string="Name")
     company_id = fields.Many2one('res.company', string="Company", default=lambda self: self.env.company)
     pump_id = fields.Many2one('fuel.station.pump', string="Pump")
@@ -0,0 +1,158 @@
+from datetime import timedelta
+
+from odoo import api, fields, models
+
+
+class PettyCashSnapshot(models.Model):
+    """
+    Cumulative petty cash balance of an employee at the end of a day.
+
+    The current balance is the latest snapshot plus the posted move lines
+    dated after it. Snapshots are taken daily by cron and shifted in place
+    when a move dated on or before them is posted or reset to draft.
+    """
+    _name = "fuel.petty.cash.snapshot"
+    _description = "Petty Cash Balance Snapshot"
+    _order = "date desc, id desc"
+    _sql_constraints = [
+        ('employee_account_date_uniq', 'unique(employee_id, account_id, date)',
+         'Only one petty cash snapshot per employee, account and day is allowed.'),
+    ]
+
+    employee_id = fields.Many2one('hr.employee', string="Employee", required=True, ondelete='cascade')
+    account_id = fields.Many2one('account.account', string="Petty Cash Account", required=True, ondelete='cascade')
+    date = fields.Date(string="Date", required=True)
+    balance = fields.Float(string="Balance", help="Balance including every posted line up to this date.")
+
+    def _flush_ledger(self):
+        self.env['account.move.line'].flush_model(['account_id', 'date', 'debit', 'credit', 'parent_state'])
+        self.flush_model()
+
+    @api.model
+    def _lock_accounts(self, account_ids):
+        """
+        Serialise the snapshot cron and the posting of petty cash lines on
+        the same accounts, locking in account order to avoid deadlocks.
+
+        Transactions run in REPEATABLE READ, so waiting for the lock is not
+        enough: the second transaction would still compute on the data it
+        saw before the first one committed. The empty UPDATE of the account
+        rows turns that case into a serialization failure, and the request
+        is retried on fresh data.
+        """
+        account_ids = sorted(set(account_ids))
+        if not account_ids:
+            return
+        self.env.cr.execute("""
+            SELECT pg_advisory_xact_lock(hashtext('fuel.petty.cash:' || account_id))
+              FROM unnest(%s::int[]) AS account_id
+        """, [account_ids])
+        self.env.cr.execute("UPDATE account_account SET id = id WHERE id = ANY(%s)", [account_ids])
+
+    @api.model
+    def _get_balances(self, employees):
+        """ Return {employee_id: balance} for all employees in one query. """
+        employees = employees.filtered(lambda e: e.coa_id and isinstance(e.id, int))
+        if not employees:
+            return {}
+
+        self._flush_ledger()
+        self.env.cr.execute("""
+            SELECT emp.employee_id,
+                   COALESCE(snap.balance, 0.0) + COALESCE(tail.balance, 0.0)
+              FROM unnest(%s::int[], %s::int[]) AS emp(employee_id, account_id)
+         LEFT JOIN LATERAL (
+                       SELECT s.date, s.balance
+                         FROM fuel_petty_cash_snapshot s
+                        WHERE s.employee_id = emp.employee_id
+                          AND s.account_id = emp.account_id
+                     ORDER BY s.date DESC
+                        LIMIT 1
+                   ) snap ON TRUE
+         LEFT JOIN LATERAL (
+                       SELECT SUM(l.debit - l.credit) AS balance
+                         FROM account_move_line l
+                        WHERE l.account_id = emp.account_id
+                          AND l.parent_state = 'posted'
+                          AND (snap.date IS NULL OR l.date > snap.date)
+                   ) tail ON TRUE
+        """, [employees.ids, [employee.coa_id.id for employee in employees]])
+        return dict(self.env.cr.fetchall())
+
+    @api.model
+    def _apply_move_lines(self, lines, sign=1):
+        """
+        Shift the snapshots taken on or after the date of each line by the
+        line balance. Called with sign=1 when lines get posted and sign=-1
+        when a posted move goes back to draft.
+        """
+        if not lines:
+            return
+
+        employees = self.env['hr.employee'].sudo().with_context(active_test=False).search([
+            ('coa_id', 'in', lines.account_id.ids),
+        ])
+        petty_lines = lines.filtered(lambda l: l.account_id in employees.coa_id)
+        if not petty_lines:
+            return
+
+        deltas = {}
+        for line in petty_lines:
+            key = (line.account_id.id, line.date)
+            deltas[key] = deltas.get(key, 0.0) + sign * (line.debit - line.credit)
+
+        self._flush_ledger()
+        self._lock_accounts(petty_lines.account_id.ids)
+        account_ids, dates, amounts = zip(*((a, d, v) for (a, d), v in deltas.items()))
+        self.env.cr.execute("""
+            UPDATE fuel_petty_cash_snapshot s
+               SET balance = s.balance + agg.delta
+              FROM (
+                       SELECT snap.id, SUM(d.delta) AS delta
+                         FROM fuel_petty_cash_snapshot snap
+                         JOIN unnest(%s::int[], %s::date[], %s::float8[]) AS d(account_id, date, delta)
+                           ON d.account_id = snap.account_id
+                          AND snap.date >= d.date
+                     GROUP BY snap.id
+                   ) agg
+             WHERE s.id = agg.id
+        """, [list(account_ids), list(dates), list(amounts)])
+        self.invalidate_model(['balance'])
+
+    @api.model
+    def _cron_take_snapshots(self, date=None):
+        """ Store the closing balance of `date` (default: yesterday) for every petty cash employee. """
+        date = date or fields.Date.context_today(self) - timedelta(days=1)
+
+        self.env['hr.employee'].flush_model(['coa_id'])
+        self._flush_ledger()
+        self.env.cr.execute("SELECT DISTINCT coa_id FROM hr_employee WHERE coa_id IS NOT NULL")
+        self._lock_accounts([account_id for account_id, in self.env.cr.fetchall()])
+        self.env.cr.execute("""
+            INSERT INTO fuel_petty_cash_snapshot
+                        (employee_id, account_id, date, balance,
+                         create_uid, create_date, write_uid, write_date)
+                 SELECT e.id, e.coa_id, %(date)s,
+                        COALESCE(snap.balance, 0.0) + COALESCE(tail.balance, 0.0),
+                        %(uid)s, now() AT TIME ZONE 'UTC', %(uid)s, now() AT TIME ZONE 'UTC'
+                   FROM hr_employee e
+              LEFT JOIN LATERAL (
+                            SELECT s.date, s.balance
+                              FROM fuel_petty_cash_snapshot s
+                             WHERE s.employee_id = e.id
+                               AND s.account_id = e.coa_id
+                               AND s.date < %(date)s
+                          ORDER BY s.date DESC
+                             LIMIT 1
+                        ) snap ON TRUE
+              LEFT JOIN LATERAL (
+                            SELECT SUM(l.debit - l.credit) AS balance
+                              FROM account_move_line l
+                             WHERE l.account_id = e.coa_id
+                               AND l.parent_state = 'posted'
+                               AND l.date <= %(date)s
+                               AND (snap.date IS NULL OR l.date > snap.date)
+                        ) tail ON TRUE
+                  WHERE e.coa_id IS NOT NULL
+            ON CONFLICT (employee_id, account_id, date) DO NOTHING
+        """, {'date': date, 'uid': self.env.uid})
@@ -1,7 +1,11 @@
 from odoo import models, fields
 
 class ProductTemplate(models.Model):
-    _inherit = "product.template"
+    _name = "product.template"
+    _inherit = ["product.template", "fuel.cache.version.mixin"]
+
+    # Fuel names printed on the cached report PDFs
+    _cache_version_fields = ('name',)
 
     is_fuel_product = fields.Boolean(
         string="Fuel Product",
@@ -2,8 +2,11 @@ from odoo import api, fields, models, _
 
 class FuelStationPump(models.Model):
     _name = 'fuel.station.pump'
+    _inherit = ['fuel.cache.version.mixin']
     _description = "Fuel Station Pump"
 
+    _cache_version_fields = ('name',)
+
     name = fields.Char(string="Name")
     company_id = fields.Many2one('res.company', string="Company", default=lambda self: self.env.company)
     line_ids = fields.One2many('fuel.station.line', 'pump_id', string="Lines")
@@ -0,0 +1,224 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+
+
+class FuelStationJob(models.Model):
+    _inherit = "fuel.station.job"
+
+    # Ranges of at least this many days are rendered by a background job
+    _REPORT_SYNC_DAYS = 7
+    # Rendered reports older than this are dropped by the workers
+    _REPORT_KEEP = timedelta(days=7)
+
+    _REPORT_TITLES = {
+        "fuel_station.meter_reading_report_template": "Meter Reading",
+        "fuel_station.report_shift_wise_template": "Shift Wise Report",
+        "fuel_station.report_payment_mode_template": "Payment Mode Report",
+        "fuel_station.report_customer_outstanding_template": "Customer Outstanding Report",
+    }
+
+    # report: (model whose per-day versions cover the rows of the period,
+    #          models whose names or links the report prints)
+    _REPORT_SOURCES = {
+        "fuel_station.meter_reading_report_template": (
+            "closing.entry", ("fuel.station.pump", "fuel.station.nozzle", "product.template"),
+        ),
+        "fuel_station.report_shift_wise_template": (
+            "closing.entry", ("fuel.station.shift", "fuel.station.pump", "fuel.station.nozzle", "product.template"),
+        ),
+        "fuel_station.report_payment_mode_template": (
+            "account.move", ("account.journal", "fuel.shift.manager", "fuel.station.pump", "fuel.station.nozzle"),
+        ),
+        "fuel_station.report_customer_outstanding_template": (
+            "account.move", ("res.partner",),
+        ),
+    }
+
+    # Reports searched through the ORM, so under the record rules of the user
+    _REPORT_PER_USER = {
+        "fuel_station.report_payment_mode_template",
+        "fuel_station.report_customer_outstanding_template",
+    }
+
+    @api.model
+    def request_report_pdf(self, report_name, data):
+        """
+        Print PDF of the report screens.
+
+        Returns {'status': 'ready', 'url'} when a render of the same report,
+        parameters and data version is cached, or when a closed period was
+        just rendered and cached; {'status': 'queued', 'job_id'} when a long
+        range is handed to a background job, whose user gets a notification
+        with the download link once the PDF is stored; {'status': 'direct'}
+        when the screen should render it in the request as before.
+        """
+        if report_name not in self._REPORT_TITLES:
+            raise UserError(_("Unknown fuel station report: %s", report_name))
+
+        key = self._get_report_key(report_name, data)
+        attachment = self._get_cached_report(report_name, data, key)
+        if attachment:
+            return {"status": "ready", "url": self._get_report_url(attachment)}
+
+        start_date, end_date = self._get_report_period(report_name, data)
+        if (end_date - start_date).days + 1 >= self._REPORT_SYNC_DAYS:
+            job = key and self.search([
+                ("report_key", "=", key),
+                ("state", "in", ("pending", "running")),
+            ], limit=1)
+            if not job:
+                job = self._enqueue(
+                    "report_render",
+                    _("Render %s", self._get_report_filename(report_name, data)),
+                    report_name=report_name,
+                    report_data=data,
+                    report_key=key,
+                )
+            return {"status": "queued", "job_id": job.id}
+
+        if key and self._is_report_period_closed(report_name, data):
+            # Stored on a finished job like the background renders, so the
+            # cache lookup and the attachment access go through the job
+            job = self._create_report_job(report_name, data, key)
+            return {"status": "ready", "url": self._get_report_url(job._render_report_attachment())}
+        return {"status": "direct"}
+
+    # ------------------------------------------------
+    # CACHE
+    # ------------------------------------------------
+    @api.model
+    def _get_report_period(self, report_name, data):
+        if report_name == "fuel_station.meter_reading_report_template":
+            date = fields.Date.to_date(data["date"])
+            return date, date
+        form = data.get("form", {})
+        return fields.Date.to_date(form["start_date"]), fields.Date.to_date(form["end_date"])
+
+    @api.model
+    def _get_report_filename(self, report_name, data):
+        start_date, end_date = self._get_report_period(report_name, data)
+        period = start_date if start_date == end_date else f"{start_date} - {end_date}"
+        return f"{self._REPORT_TITLES[report_name]} {period}.pdf"
+
+    @api.model
+    def _get_report_version_names(self, report_name, data):
+        """ Cache versions of every table the report reads for its period. """
+        start_date, end_date = self._get_report_period(report_name, data)
+        dated_model, models = self._REPORT_SOURCES[report_name]
+        days = (start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1))
+        return [f"{dated_model}:{day}" for day in days] + list(models)
+
+    @api.model
+    def _get_report_key(self, report_name, data):
+        """
+        Cache key of the report for the current companies (and user, for
+        reports under record rules), or None while this transaction has
+        uncommitted changes to its data.
+        """
+        version = self.env["fuel.cache.version"]._get_version(self._get_report_version_names(report_name, data))
+        if version is None:
+            return None
+        payload = json.dumps(
+            [
+                report_name,
+                data,
+                sorted(self.env.companies.ids),
+                self.env.uid if report_name in self._REPORT_PER_USER else None,
+                version,
+            ],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    @api.model
+    def _is_report_period_closed(self, report_name, data):
+        """ A period is closed once it is over and every closing entry in it is settled. """
+        start_date, end_date = self._get_report_period(report_name, data)
+        if end_date >= fields.Date.context_today(self):
+            return False
+        return not self.env["closing.entry"].search_count([
+            ("business_date", ">=", start_date),
+            ("business_date", "<=", end_date),
+            ("state", "!=", "settled"),
+        ], limit=1)
+
+    @api.model
+    def _get_cached_report(self, report_name, data, key):
+        """
+        The PDF cached under `key`. A render of another user (the key then
+        holds no record rule) is shared through a finished job of the
+        current user, holding a copy of the attachment on the same file.
+        """
+        if not key:
+            return self.env["ir.attachment"]
+        domain = [("report_key", "=", key), ("state", "=", "done"), ("attachment_id", "!=", False)]
+        attachment = self.search(domain, limit=1).attachment_id
+        if attachment or report_name in self._REPORT_PER_USER:
+            return attachment
+
+        shared = self.sudo().search(domain, limit=1).attachment_id
+        if not shared:
+            return shared
+        job = self._create_report_job(report_name, data, key)
+        job.sudo().attachment_id = shared.copy({"res_id": job.id})
+        return job.attachment_id
+
+    @api.model
+    def _create_report_job(self, report_name, data, key):
+        """ Finished job holding a PDF rendered in the request. """
+        return self._create_job(
+            "report_render",
+            _("Render %s", self._get_report_filename(report_name, data)),
+            state="done",
+            date_done=fields.Datetime.now(),
+            report_name=report_name,
+            report_data=data,
+            report_key=key,
+        )
+
+    @api.model
+    def _get_report_url(self, attachment):
+        return f"/web/content/{attachment.id}?download=true"
+
+    def _render_report_attachment(self):
+        """ Render the PDF of the job and store it on the job, under its cache key. """
+        self.ensure_one()
+        data = self.report_data or {}
+        # Keyed on the version read before rendering: a change made meanwhile
+        # gives a new key, so the next request renders again
+        key = self._get_report_key(self.report_name, data)
+        pdf, __ = self.env["ir.actions.report"]._render_qweb_pdf(self.report_name, data=data)
+
+        # Users only read jobs, which is also what lets them read the attachment
+        attachment = self.env["ir.attachment"].sudo().create({
+            "name": self._get_report_filename(self.report_name, data),
+            "type": "binary",
+            "raw": pdf,
+            "mimetype": "application/pdf",
+            "res_model": self._name,
+            "res_id": self.id,
+        })
+        self.sudo().write({"attachment_id": attachment.id, "report_key": key})
+        return self.attachment_id
+
+    # ------------------------------------------------
+    # CLEANUP
+    # ------------------------------------------------
+    @api.model
+    def _cron_run_jobs(self):
+        super()._cron_run_jobs()
+        self._gc_report_renders()
+
+    @api.model
+    def _gc_report_renders(self):
+        """ Drop old rendered reports; unlinking the jobs removes their attachments. """
+        self.search([
+            ("job_type", "=", "report_render"),
+            ("state", "=", "done"),
+            ("date_done", "<", fields.Datetime.now() - self._REPORT_KEEP),
+        ]).unlink()
@@ -2,8 +2,11 @@ from odoo import api, fields, models, _
 
 class FuelStationShift(models.Model):
     _name = 'fuel.station.shift'
+    _inherit = ['fuel.cache.version.mixin']
     _description = "Fuel Station Shift"
 
+    _cache_version_fields = ('name',)
+
     name = fields.Char(string="Name")
     sequence = fields.Integer(string="Sequence")
     company_id = fields.Many2one('res.company', string="Company", default=lambda self: self.env.company)
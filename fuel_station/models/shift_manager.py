@@ -3,9 +3,12 @@ from odoo import api, fields, models, _
 
 class FuelShiftManager(models.Model):
     _name = 'fuel.shift.manager'
-    _inherit = ["mail.thread", "mail.activity.mixin"]
+    _inherit = ["mail.thread", "mail.activity.mixin", "fuel.cache.version.mixin"]
     _description = "Fuel Shift Manager"
 
+    # The payment mode report prints the pump of the shift manager
+    _cache_version_fields = ('pump_id',)
+
     shift_id = fields.Many2one('fuel.station.shift', string="Shift", tracking=True)
     employee_id = fields.Many2one('hr.employee', string="Employee", tracking=True)
     employee_coa_id = fields.Many2one(
@@ -72,3 +75,19 @@ class FuelShiftManager(models.Model):
                 order='id desc'
             )
             rec.closing_amount = closing.closing_amount if closing else 0.0
+
+    def write(self, vals):
+        if 'assigned_date' not in vals:
+            return super().write(vals)
+
+        # The business date of the closing entries is recomputed from the
+        # assigned date without a write on them, so their facts and cache
+        # versions move here
+        Fact = self.env['fuel.daily.fact']
+        entries = self.env['closing.entry'].sudo().search([('shift_manager_id', 'in', self.ids)])
+        keys = Fact._get_keys(entries)
+        names = entries._get_cache_version_names()
+        res = super().write(vals)
+        Fact._refresh(keys | Fact._get_keys(entries))
+        entries._bump_cache_versions(names)
+        return res
@@ -153,7 +153,7 @@ export class CashSettlement extends Component {
 
         this.submitShiftSettlement = async (card) => {
 
-            if (card._submitted) {
+            if (card._submitted || card._submitting) {
                 return;
             }
 
@@ -183,6 +183,9 @@ export class CashSettlement extends Component {
                 return;
             }
 
+            // 🔑 One key per card: a retried request returns the same settlement
+            card._idempotencyKey = card._idempotencyKey || crypto.randomUUID();
+
             // 3️⃣ Build payload
             const payload = {
                 date: this.state.date,
@@ -191,9 +194,11 @@ export class CashSettlement extends Component {
                 payment_lines: paymentLines,
                 closing_entry_ids: card.closing_entry_ids,
                 employee_id: this.state.selectedEmployee?.id,
+                idempotency_key: card._idempotencyKey,
             };
 
             // 4️⃣ Call backend
+            card._submitting = true;
             try {
                 await this.orm.call(
                     "closing.entry",
@@ -214,6 +219,8 @@ export class CashSettlement extends Component {
                     err.message || "Submission failed",
                     { type: "danger" }
                 );
+            } finally {
+                card._submitting = false;
             }
         };
 
@@ -3,6 +3,7 @@
 import { Component, useState, onWillStart, useEffect } from "@odoo/owl";
 import { registry } from "@web/core/registry";
 import { useService } from "@web/core/utils/hooks";
+import { printFuelReport } from "./report_print";
 
 export class CustomerOutstanding extends Component {
     static template = "fuel_station.customer_outstanding";
@@ -59,11 +60,10 @@ export class CustomerOutstanding extends Component {
     }
 
     printReport() {
-        this.actionService.doAction({
-            type: "ir.actions.report",
-            report_name: "fuel_station.report_customer_outstanding_template",
-            report_type: "qweb-pdf",
-            data: {
+        return printFuelReport(
+            { orm: this.orm, action: this.actionService, notification: this.notification },
+            "fuel_station.report_customer_outstanding_template",
+            {
                 form: {
                     start_date: this.state.start_date,
                     end_date: this.state.end_date,
@@ -72,7 +72,16 @@ export class CustomerOutstanding extends Component {
                         : [],
                 }
             }
+        );
+    }
+
+    exportReport(fileFormat) {
+        const params = new URLSearchParams({
+            start_date: this.state.start_date,
+            end_date: this.state.end_date,
+            partner_ids: this.state.customer_id || "",
         });
+        window.location.assign(`/fuel_station/export/customer_outstanding/${fileFormat}?${params}`);
     }
 }
 
@@ -34,12 +34,16 @@ export class FuelDashboard extends Component {
             products_stock: [],
              // Shift Based Collection
             collection: [],
+            collection_count: 0,
+            collection_total_sales: 0,
+            collection_total_amount: 0,
             collection_page: 1,
             collection_page_size: 5,
             from_date: today,
             to_date: today,
             group_by: "shift",
             sortOrder: "asc",
+            shiftSortBy: "name",
             shiftSortOrder: "asc",
             pricing_date: today,
             fuel_pricing: [],
@@ -47,9 +51,13 @@ export class FuelDashboard extends Component {
             fuel_sale_type: "all",   // all | walk | credit | loyalty
             page: 1,
             pageSize: 5,
+            salesCursors: [null],
+            salesNextCursor: false,
             hasNext: false,
             hasPrev: false,
             credit_invoices: [],
+            credit_summary: { partners: [], total: { due_amount: 0, ageing: {} } },
+            credit_partner_id: false,
             credit_loading: false,
             credit_page: 1,
             credit_page_size: 5,
@@ -63,16 +71,7 @@ export class FuelDashboard extends Component {
         });
 
         onMounted(async () => {
-            await this.loadAll();
-            await this.loadAssignmentsForDate();
-            await this.loadRecentClosings();
-            await this.loadStockProducts();
-            await this.loadFuelPricing();
-            await this.loadFuelSales();
-            await this.loadCollection();
-            this.state.credit_page = 1;
-            await this.loadCreditInvoices();
-            await this.loadTodaySalesAmount();
+            await this.loadDashboardSnapshot();
 
             const grids = document.querySelectorAll(".stock-grid-top");
 
@@ -92,6 +91,56 @@ export class FuelDashboard extends Component {
         });
     }
 
+    /* ================= INITIAL LOAD ================= */
+
+    async loadDashboardSnapshot() {
+        this.state.loading = true;
+
+        try {
+            // Every panel in one round trip; the load* methods below
+            // are kept for refreshing a single panel afterwards.
+            const snapshot = await this.orm.call(
+                "closing.entry",
+                "get_dashboard_snapshot",
+                [{
+                    today: new Date().toISOString().slice(0, 10),
+                    assign_date: this.state.assign_date,
+                    pricing_date: this.state.pricing_date,
+                    fuel_sale_type: this.state.fuel_sale_type,
+                    page_size: this.state.pageSize,
+                    from_date: this.state.from_date,
+                    to_date: this.state.to_date,
+                    group_by: this.state.group_by,
+                    collection_page_size: this.state.collection_page_size,
+                    credit_page_size: this.state.credit_page_size,
+                }]
+            );
+
+            this.state.shifts = snapshot.shifts;
+            this.state.nozzlesFlat = snapshot.nozzles;
+            this.state.employees = snapshot.employees;
+            this.applyAssignments(snapshot.assignments);
+            this.state.recent_closings = snapshot.recent_closings;
+            this.state.products_stock = snapshot.products_stock;
+            this.state.fuel_pricing = snapshot.fuel_pricing;
+
+            this.state.page = 1;
+            this.state.salesCursors = [null];
+            this.applyFuelSales(snapshot.fuel_sales);
+
+            this.state.collection_page = 1;
+            this.applyCollection(snapshot.collection);
+
+            this.state.credit_page = 1;
+            this.state.credit_summary = snapshot.credit_invoices.summary;
+            this.applyCreditInvoices(snapshot.credit_invoices);
+
+            this.state.today_sales_amount = snapshot.today_sales_amount;
+        } finally {
+            this.state.loading = false;
+        }
+    }
+
     get visibleStocks() {
         const { currentStockIndex, tilesPerPage } = this.state;
         return this.state.products_stock.slice(
@@ -166,51 +215,50 @@ export class FuelDashboard extends Component {
         });
     }
 
-    async loadCreditInvoices() {
+    async loadCreditPanel() {
         this.state.credit_loading = true;
 
         try {
-            const offset =
-                (this.state.credit_page - 1) * this.state.credit_page_size;
-
-            // fetch one extra to detect next page
-            const records = await this.orm.searchRead(
-                "account.move",
-                [
-                    ["move_type", "=", "out_invoice"],
-                    ["fuel_inv_type", "=", "credit"],
-                    ["payment_state", "in", ["not_paid", "partial"]],
-                    ["state", "=", "posted"],
-                ],
-                [
-                    "name",
-                    "invoice_date",
-                    "partner_id",
-                    "amount_total",
-                    "amount_residual_signed",
-                    "payment_state",
-                ],
-                {
-                    order: "invoice_date desc",
-                    limit: this.state.credit_page_size + 1,
-                    offset: offset,
-                }
+            // summary and first drill-down page together, on a customer change
+            this.state.credit_page = 1;
+            const result = await this.orm.call(
+                "closing.entry",
+                "get_credit_panel",
+                [this.state.credit_partner_id, this.state.credit_page_size]
             );
+            this.state.credit_summary = result.summary;
+            this.applyCreditInvoices(result);
+        } finally {
+            this.state.credit_loading = false;
+        }
+    }
 
-            this.state.credit_hasPrev = this.state.credit_page > 1;
-            this.state.credit_hasNext =
-                records.length > this.state.credit_page_size;
+    async loadCreditInvoices() {
+        this.state.credit_loading = true;
 
-            // keep only page size
-            this.state.credit_invoices = records.slice(
-                0,
-                this.state.credit_page_size
+        try {
+            // drill-down page only, the summary covers every invoice already
+            const result = await this.orm.call(
+                "closing.entry",
+                "get_credit_invoices_page",
+                [
+                    this.state.credit_partner_id,
+                    this.state.credit_page,
+                    this.state.credit_page_size,
+                ]
             );
+            this.applyCreditInvoices(result);
         } finally {
             this.state.credit_loading = false;
         }
     }
 
+    applyCreditInvoices(result) {
+        this.state.credit_invoices = result.records;
+        this.state.credit_hasPrev = result.has_prev;
+        this.state.credit_hasNext = result.has_next;
+    }
+
     onCreditNextPage() {
         if (!this.state.credit_hasNext) return;
         this.state.credit_page += 1;
@@ -223,29 +271,26 @@ export class FuelDashboard extends Component {
         this.loadCreditInvoices();
     }
 
-    get customerWiseInvoices() {
-        const result = {};
-
-        for (const inv of this.state.credit_invoices) {
-            if (!inv.partner_id) continue;
-
-            const partnerId = inv.partner_id[0];
-            const partnerName = inv.partner_id[1];
+    onCreditCustomerClick(partnerId) {
+        this.state.credit_partner_id = partnerId;
+        this.state.customer_wise = false;
+        this.loadCreditPanel();
+    }
 
-            if (!result[partnerId]) {
-                result[partnerId] = {
-                    partner_id: partnerId,
-                    partner_name: partnerName,
-                    total_amount: 0,
-                    due_amount: 0,
-                };
-            }
+    onCreditClearCustomer() {
+        this.state.credit_partner_id = false;
+        this.loadCreditPanel();
+    }
 
-            result[partnerId].total_amount += inv.amount_total || 0;
-            result[partnerId].due_amount += inv.amount_residual_signed || 0;
-        }
+    get creditCustomerName() {
+        const partner = this.state.credit_summary.partners.find(
+            p => p.partner_id === this.state.credit_partner_id
+        );
+        return partner ? partner.partner_name : "";
+    }
 
-        return Object.values(result);
+    get customerWiseInvoices() {
+        return this.state.credit_summary.partners;
     }
 
     toggleCustomerWise(ev) {
@@ -253,36 +298,7 @@ export class FuelDashboard extends Component {
     }
 
     get totalUnpaidCreditDue() {
-        return this.state.credit_invoices.reduce(
-            (sum, inv) => sum + (inv.amount_residual_signed || 0),
-            0
-        );
-    }
-
-    async loadTodaySalesAmount() {
-        this.state.today_sales_loading = true;
-
-        try {
-            const today = new Date().toISOString().slice(0, 10);
-
-            const orders = await this.orm.searchRead(
-                "sale.order",
-                [
-                    ["state", "in", ["sale"]],
-                    ["is_fuel_sale", "=", true],
-                    ["date_order", ">=", today + " 00:00:00"],
-                    ["date_order", "<=", today + " 23:59:59"],
-                ],
-                ["amount_total"]
-            );
-
-            this.state.today_sales_amount = orders.reduce(
-                (sum, o) => sum + (o.amount_total || 0),
-                0
-            );
-        } finally {
-            this.state.today_sales_loading = false;
-        }
+        return this.state.credit_summary.total.due_amount || 0;
     }
 
     getSortIcon(field) {
@@ -299,23 +315,9 @@ export class FuelDashboard extends Component {
             this.state.shiftSortOrder = "asc";
         }
 
-        const order = this.state.shiftSortOrder === "asc" ? 1 : -1;
-
-        this.state.shift_collection.sort((a, b) => {
-            let valA = a[field];
-            let valB = b[field];
-
-            if (valA == null) return -1 * order;
-            if (valB == null) return 1 * order;
-
-            // number sorting
-            if (typeof valA === "number") {
-                return (valA - valB) * order;
-            }
-
-            // string sorting
-            return valA.toString().localeCompare(valB.toString()) * order;
-        });
+        // sorted server-side, back to the first page
+        this.state.collection_page = 1;
+        this.loadCollection();
     }
 
     getShiftSortIcon(field) {
@@ -325,36 +327,12 @@ export class FuelDashboard extends Component {
 
 
     async loadFuelPricing() {
-        // 1️⃣ Find latest pricing record <= selected date
-        const pricingRecords = await this.orm.searchRead(
-            "fuel.pricing",
-            [["pricing_date", "<=", this.state.pricing_date]],
-            ["id", "pricing_date", "line_ids"],
-            {
-                order: "pricing_date desc",
-                limit: 1,
-            }
-        );
-
-        if (!pricingRecords.length) {
-            this.state.fuel_pricing = [];
-            return;
-        }
-
-        const pricing = pricingRecords[0];
-
-        // 2️⃣ Fetch pricing lines
-        const lines = await this.orm.searchRead(
-            "fuel.pricing.line",
-            [["pricing_id", "=", pricing.id]],
-            ["product_id", "price"]
+        // Effective price of every fuel on the selected date
+        this.state.fuel_pricing = await this.orm.call(
+            "closing.entry",
+            "get_fuel_pricing_at",
+            [this.state.pricing_date]
         );
-
-        // 3️⃣ Prepare UI data
-        this.state.fuel_pricing = lines.map(l => ({
-            product_name: l.product_id?.[1],
-            price: l.price,
-        }));
     }
 
     onPricingDateChange(ev) {
@@ -363,182 +341,49 @@ export class FuelDashboard extends Component {
     }
 
     async loadFuelSales() {
-        const domain = [["is_fuel_sale", "=", true]];
-
-        if (this.state.fuel_sale_type !== "all") {
-            domain.push(["fuel_sale_type", "=", this.state.fuel_sale_type]);
-        }
+        // Top of the stack is the cursor of the page on screen
+        const cursor = this.state.salesCursors[this.state.salesCursors.length - 1];
 
-        const offset = (this.state.page - 1) * this.state.pageSize;
-
-        // Fetch 1 extra record to check next page
-        const records = await this.orm.searchRead(
-            "sale.order",
-            domain,
-            [
-                "name",
-                "date_order",
-                "partner_id",
-                "fuel_sale_type",
-                "amount_total",
-                "order_line",
-            ],
-            {
-                order: "date_order desc",
-                limit: this.state.pageSize + 1,
-                offset: offset,
-            }
+        const result = await this.orm.call(
+            "closing.entry",
+            "get_fuel_sales_page",
+            [this.state.fuel_sale_type, cursor, this.state.pageSize]
         );
+        this.applyFuelSales(result);
+    }
 
-        for (const rec of records) {
-            rec.product_name = "-";
-            rec.quantity = 0;
-
-            if (rec.order_line && rec.order_line.length) {
-                const [line] = await this.orm.searchRead(
-                    "sale.order.line",
-                    [["id", "=", rec.order_line[0]]],
-                    ["product_id", "product_uom_qty"]
-                );
-
-                if (line) {
-                    rec.product_name = line.product_id?.[1] || "-";
-                    rec.quantity = line.product_uom_qty || 0;
-                }
-            }
-        }
-
-
-        this.state.hasPrev = this.state.page > 1;
-        this.state.hasNext = records.length > this.state.pageSize;
-
-        // keep only 5 rows
-        this.state.fuel_sales = records.slice(0, this.state.pageSize);
+    applyFuelSales(result) {
+        this.state.fuel_sales = result.records;
+        this.state.salesNextCursor = result.next_cursor;
+        this.state.hasPrev = this.state.salesCursors.length > 1;
+        this.state.hasNext = result.has_next;
     }
 
     onFuelSaleTypeChange(ev) {
         this.state.fuel_sale_type = ev.target.value;
         this.state.page = 1;
+        this.state.salesCursors = [null];
         this.loadFuelSales();
     }
 
     onNextPage() {
         if (!this.state.hasNext) return;
         this.state.page += 1;
+        this.state.salesCursors.push(this.state.salesNextCursor);
         this.loadFuelSales();
     }
 
     onPrevPage() {
         if (!this.state.hasPrev) return;
         this.state.page -= 1;
+        this.state.salesCursors.pop();
         this.loadFuelSales();
     }
 
-    async loadStockProducts() {
-
-        // 1️⃣ Fetch stock
-        const quants = await this.orm.searchRead(
-            "stock.quant",
-            [
-                ["product_id.is_fuel_product", "=", true],
-                ["product_id.active", "=", true],
-                ["location_id.usage", "=", "internal"],
-            ],
-            ["product_id", "location_id", "quantity", "product_uom_id"]
-        );
-
-        // 2️⃣ Collect unique product IDs
-        const productIds = [...new Set(quants.map(q => q.product_id[0]))];
-
-        // 3️⃣ Fetch product prices
-        const products = await this.orm.searchRead(
-            "product.product",
-            [["id", "in", productIds]],
-            ["id", "list_price", "currency_id"]
-        );
-
-        // 4️⃣ Create price lookup
-        const priceMap = {};
-        products.forEach(p => {
-            priceMap[p.id] = {
-                price: p.list_price,
-                currency: p.currency_id?.[1] || "-",
-            };
-        });
-
-        // 5️⃣ Merge stock + price
-        this.state.products_stock = quants.map(q => ({
-            id: `${q.product_id[0]}_${q.location_id[0]}`,
-            product_id: q.product_id[0],
-            product_name: q.product_id[1],
-            location_id: q.location_id[0],
-            location_name: q.location_id[1],
-            qty: q.quantity,
-            uom: q.product_uom_id?.[1] || "",
-            price: priceMap[q.product_id[0]]?.price || 0,
-            currency: priceMap[q.product_id[0]]?.currency || "-",
-            stock_value: q.quantity * (priceMap[q.product_id[0]]?.price || 0),
-
-        }));
-    }
-
-
     getProductImageUrl(productId) {
         return `/web/image/product.product/${productId}/image_128`;
     }
 
-    async loadAll() {
-        this.state.loading = true;
-
-        try {
-            await Promise.all([
-                this.loadShifts(),
-                this.loadNozzles(),
-                this.loadEmployees()
-            ]);
-
-            this.state.nozzlesFlat.sort((a, b) => {
-                if (a.pump_name < b.pump_name) return -1;
-                if (a.pump_name > b.pump_name) return 1;
-                return a.name.localeCompare(b.name);
-            });
-
-        } finally {
-            this.state.loading = false;
-        }
-    }
-
-    async loadShifts() {
-        this.state.shifts = await this.orm.searchRead(
-            "fuel.station.shift",
-            [],
-            ["name", "start_time", "end_time"]
-        );
-    }
-
-    async loadNozzles() {
-        const nozzles = await this.orm.searchRead(
-            "fuel.station.nozzle",
-            [],
-            ["name", "pump_id", "product_id"]
-        );
-
-        this.state.nozzlesFlat = nozzles.map(n => ({
-            id: n.id,
-            name: n.name,
-            pump_id: n.pump_id?.[0] || null,
-            pump_name: n.pump_id?.[1] || "",
-        }));
-    }
-
-    async loadEmployees() {
-        this.state.employees = await this.orm.searchRead(
-            "hr.employee",
-            [],
-            ["name"]
-        );
-    }
-
     async loadRecentClosings() {
         this.state.recent_closings = await this.orm.searchRead(
             "closing.entry",
@@ -723,9 +568,6 @@ export class FuelDashboard extends Component {
     }
 
     async loadAssignmentsForDate() {
-        this.state.selections = {};
-        this.state.assignedCells = {};
-
         const date = this.state.assign_date;
 
         const items = await this.orm.searchRead(
@@ -734,6 +576,13 @@ export class FuelDashboard extends Component {
             ["shift_id", "employee_id", "nozzle_id"]
         );
 
+        this.applyAssignments(items);
+    }
+
+    applyAssignments(items) {
+        this.state.selections = {};
+        this.state.assignedCells = {};
+
         for (const rec of items) {
             const shiftId = rec.shift_id[0];
             const nozzleId = rec.nozzle_id[0];
@@ -758,51 +607,25 @@ export class FuelDashboard extends Component {
         const { from_date, to_date, group_by } = this.state;
         if (!from_date || !to_date) return;
 
-        // reset ONLY collection pagination
-        this.state.collection_page = 1;
-
-        const closings = await this.orm.searchRead(
+        const result = await this.orm.call(
             "closing.entry",
-            [
-                ["create_date", ">=", from_date + " 00:00:00"],
-                ["create_date", "<=", to_date + " 23:59:59"],
-            ],
-            [
-                "shift_id",
-                "nozzle_id",
-                "pump_id",
-                "start_reading",
-                "end_reading",
-            ]
-        );
-
-        const fieldMap = {
-            shift: "shift_id",
-            nozzle: "nozzle_id",
-            pump: "pump_id",
-        };
-
-        const field = fieldMap[group_by];
-        const result = {};
-
-        for (const c of closings) {
-            if (!c[field]) continue;
-
-            const id = c[field][0];
-            const name = c[field][1];
-            const qty = (c.end_reading || 0) - (c.start_reading || 0);
-
-            if (!result[id]) {
-                result[id] = {
-                    name,
-                    total_sales: 0,
-                };
+            "get_collection_summary",
+            [from_date, to_date, group_by],
+            {
+                sort_by: this.state.shiftSortBy,
+                sort_order: this.state.shiftSortOrder,
+                offset: (this.state.collection_page - 1) * this.state.collection_page_size,
+                limit: this.state.collection_page_size,
             }
+        );
+        this.applyCollection(result);
+    }
 
-            result[id].total_sales += qty;
-        }
-
-        this.state.collection = Object.values(result);
+    applyCollection(result) {
+        this.state.collection = result.rows;
+        this.state.collection_count = result.count;
+        this.state.collection_total_sales = result.total_sales;
+        this.state.collection_total_amount = result.total_amount;
     }
 
     // ===============================
@@ -810,6 +633,7 @@ export class FuelDashboard extends Component {
     // ===============================
     setGroupBy(type) {
         this.state.group_by = type;
+        this.state.collection_page = 1;
         this.loadCollection();
     }
 
@@ -836,30 +660,24 @@ export class FuelDashboard extends Component {
     // PAGINATION
     // ===============================
     get paginatedRows() {
-        if (!Array.isArray(this.state.collection)) {
-            return [];
-        }
-        const start =
-            (this.state.collection_page - 1) * this.state.collection_page_size;
-
-        return this.state.collection.slice(
-            start,
-            start + this.state.collection_page_size
-        );
+        // the server already returns only the current page
+        return Array.isArray(this.state.collection) ? this.state.collection : [];
     }
 
     nextPage() {
         if (
             this.state.collection_page * this.state.collection_page_size <
-            this.state.collection.length
+            this.state.collection_count
         ) {
             this.state.collection_page++;
+            this.loadCollection();
         }
     }
 
     prevPage() {
         if (this.state.collection_page > 1) {
             this.state.collection_page--;
+            this.loadCollection();
         }
     }
 
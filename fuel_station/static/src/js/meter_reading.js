@@ -3,6 +3,7 @@
 import { Component, useState } from "@odoo/owl";
 import { registry } from "@web/core/registry";
 import { useService } from "@web/core/utils/hooks";
+import { printFuelReport } from "./report_print";
 
 export class MeterReading extends Component {
     static template = "fuel_station.meter_reading";
@@ -10,6 +11,7 @@ export class MeterReading extends Component {
     setup() {
         this.orm = useService("orm");
         this.action = useService("action");
+        this.notification = useService("notification");
 
         const today = new Date().toISOString().slice(0, 10);
 
@@ -42,18 +44,11 @@ export class MeterReading extends Component {
     }
 
     onPrintPdf() {
-        const data = {
-            report_lines: this.state.lines || [],
-            date: this.state.selectedDate,
-        };
-
-        return this.action.doAction({
-            type: "ir.actions.report",
-            report_type: "qweb-pdf",
-            report_name: "fuel_station.meter_reading_report_template",
-            report_file: "fuel_station.meter_reading_report_template",
-            data: data,
-        });
+        return printFuelReport(
+            { orm: this.orm, action: this.action, notification: this.notification },
+            "fuel_station.meter_reading_report_template",
+            { date: this.state.selectedDate }
+        );
     }
 
 
@@ -64,6 +59,11 @@ export class MeterReading extends Component {
         this.state.selectedDate = ev.target.value;
         this.loadData();
     }
+
+    exportReport(fileFormat) {
+        const params = new URLSearchParams({ date: this.state.selectedDate });
+        window.location.assign(`/fuel_station/export/meter_reading/${fileFormat}?${params}`);
+    }
 }
 
 registry.category("actions").add(
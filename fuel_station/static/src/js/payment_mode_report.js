@@ -3,6 +3,7 @@
 import { Component, useState, onWillStart, useEffect } from "@odoo/owl";
 import { registry } from "@web/core/registry";
 import { useService } from "@web/core/utils/hooks";
+import { printFuelReport } from "./report_print";
 
 export class PaymentMode extends Component {
     static template = "fuel_station.payment_mode";
@@ -70,11 +71,10 @@ export class PaymentMode extends Component {
     }
 
     printReport() {
-        this.actionService.doAction({
-            type: "ir.actions.report",
-            report_name: "fuel_station.report_payment_mode_template",
-            report_type: "qweb-pdf",
-            data: {
+        return printFuelReport(
+            { orm: this.orm, action: this.actionService, notification: this.notification },
+            "fuel_station.report_payment_mode_template",
+            {
                 form: {
                     start_date: this.state.start_date,
                     end_date: this.state.end_date,
@@ -83,7 +83,16 @@ export class PaymentMode extends Component {
                         : [],
                 }
             }
+        );
+    }
+
+    exportReport(fileFormat) {
+        const params = new URLSearchParams({
+            start_date: this.state.start_date,
+            end_date: this.state.end_date,
+            journal_ids: this.state.journal_id || "",
         });
+        window.location.assign(`/fuel_station/export/payment_mode/${fileFormat}?${params}`);
     }
 }
 
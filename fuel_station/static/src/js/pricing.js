@@ -15,6 +15,7 @@ export class Pricing extends Component {
             products: [],
             loading: true,
             pricing_date: new Date().toISOString().slice(0, 10),
+            activation_time: "00:00",
         });
 
         onMounted(async () => {
@@ -50,10 +51,16 @@ export class Pricing extends Component {
             return;
         }
 
+        // Local activation moment → UTC "YYYY-MM-DD HH:MM:SS"
+        const activation = new Date(
+            `${this.state.pricing_date}T${this.state.activation_time || "00:00"}`
+        ).toISOString().slice(0, 19).replace("T", " ");
+
         // 1️⃣ Create pricing record (ARRAY is mandatory)
         const [pricingId] = await this.orm.create("fuel.pricing", [
             {
                 pricing_date: this.state.pricing_date,
+                activation_datetime: activation,
                 line_ids: this.state.products.map(p => [
                     0, 0, {
                         product_id: p.product_id,
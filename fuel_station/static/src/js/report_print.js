@@ -0,0 +1,60 @@
+/** @odoo-module **/
+
+import { _t } from "@web/core/l10n/translation";
+import { registry } from "@web/core/registry";
+
+/**
+ * Print a fuel station PDF report through the server-side report cache:
+ * a cached render downloads at once, a long range is rendered in the
+ * background (a notification follows when it is ready) and anything else
+ * is rendered in the request as a regular report action.
+ */
+export async function printFuelReport({ orm, action, notification }, reportName, data) {
+    const result = await orm.call("fuel.station.job", "request_report_pdf", [reportName, data]);
+
+    if (result.status === "ready") {
+        window.location.assign(result.url);
+    } else if (result.status === "queued") {
+        notification.add(
+            _t("The report is being generated in the background. You will be notified when it is ready."),
+            { type: "info" }
+        );
+    } else {
+        return action.doAction({
+            type: "ir.actions.report",
+            report_type: "qweb-pdf",
+            report_name: reportName,
+            data: data,
+        });
+    }
+}
+
+/**
+ * Notification sent by the worker once a background render is stored,
+ * with a button downloading it.
+ */
+export const fuelReportReadyService = {
+    dependencies: ["bus_service", "notification"],
+    start(env, { bus_service, notification }) {
+        bus_service.subscribe("fuel_station.report_ready", ({ title, message, url }) => {
+            const close = notification.add(message, {
+                title,
+                type: "success",
+                sticky: true,
+                buttons: [
+                    {
+                        name: _t("Download"),
+                        primary: true,
+                        onClick: () => {
+                            window.location.assign(url);
+                            close();
+                        },
+                    },
+                ],
+            });
+        });
+        bus_service.start();
+    },
+};
+
+registry.category("services").add("fuel_station_report_ready", fuelReportReadyService);
@@ -3,6 +3,7 @@
 import { Component, useState, useEffect } from "@odoo/owl";
 import { registry } from "@web/core/registry";
 import { useService } from "@web/core/utils/hooks";
+import { printFuelReport } from "./report_print";
 
 export class ShiftReport extends Component {
     static template = "fuel_station.shift_report";
@@ -17,14 +18,24 @@ export class ShiftReport extends Component {
         this.state = useState({
             start_date: today,
             end_date: today,
-            shiftData: {},
+            lines: [],
+            subtotals: [],
             loading: false,
+
+            // Keyset paging: stack of the cursors of the pages visited
+            pageSize: 200,
+            page: 1,
+            cursors: [null],
+            nextCursor: false,
+            hasNext: false,
         });
 
         // ✅ AUTO LOAD when dates change
         useEffect(
             () => {
                 if (this.state.start_date && this.state.end_date) {
+                    this.state.page = 1;
+                    this.state.cursors = [null];
                     this.loadData();
                 }
             },
@@ -35,15 +46,65 @@ export class ShiftReport extends Component {
     async loadData() {
         this.state.loading = true;
 
-        this.state.shiftData = await this.orm.call(
+        // Top of the stack is the cursor of the page on screen
+        const cursor = this.state.cursors[this.state.cursors.length - 1];
+
+        const result = await this.orm.call(
             "closing.entry",
             "get_shift_wise_data",
-            [this.state.start_date, this.state.end_date]
+            [this.state.start_date, this.state.end_date, cursor, this.state.pageSize]
         );
 
+        this.state.lines = result.lines;
+        this.state.nextCursor = result.next_cursor;
+        this.state.hasNext = result.has_next;
+        if (result.subtotals) {
+            this.state.subtotals = result.subtotals;
+        }
+
         this.state.loading = false;
     }
 
+    /**
+     * Lines of the page on screen grouped per shift, each with the subtotal
+     * of that shift over the whole range.
+     */
+    get shiftGroups() {
+        const groups = [];
+        for (const line of this.state.lines) {
+            let group = groups[groups.length - 1];
+            if (!group || group.shift_id !== line.shift_id) {
+                group = {
+                    shift_id: line.shift_id,
+                    name: line.shift,
+                    lines: [],
+                    subtotal: this.state.subtotals.find((s) => s.shift_id === line.shift_id),
+                };
+                groups.push(group);
+            }
+            group.lines.push(line);
+        }
+        return groups;
+    }
+
+    get hasPrev() {
+        return this.state.cursors.length > 1;
+    }
+
+    onNextPage() {
+        if (!this.state.hasNext) return;
+        this.state.page += 1;
+        this.state.cursors.push(this.state.nextCursor);
+        this.loadData();
+    }
+
+    onPrevPage() {
+        if (!this.hasPrev) return;
+        this.state.page -= 1;
+        this.state.cursors.pop();
+        this.loadData();
+    }
+
     generateReport() {
         if (!this.state.start_date || !this.state.end_date) {
             this.notification.add(
@@ -53,17 +114,21 @@ export class ShiftReport extends Component {
             return;
         }
 
-        this.actionService.doAction({
-            type: "ir.actions.report",
-            report_name: "fuel_station.report_shift_wise_template",
-            report_type: "qweb-pdf",
-            data: {
+        return printFuelReport(
+            { orm: this.orm, action: this.actionService, notification: this.notification },
+            "fuel_station.report_shift_wise_template",
+            {
                 form: {
                     start_date: this.state.start_date,
                     end_date: this.state.end_date,
                 }
             }
-        });
+        );
+    }
+
+    exportReport(fileFormat) {
+        const params = new URLSearchParams({ start_date: this.state.start_date, end_date: this.state.end_date });
+        window.location.assign(`/fuel_station/export/shift_wise/${fileFormat}?${params}`);
     }
 }
 
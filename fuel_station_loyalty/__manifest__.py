@@ -5,6 +5,7 @@
     'license': 'LGPL-3',
     'depends': ['base', 'web', 'hr', 'stock', 'sale', 'account', 'product', 'sale_loyalty', 'purchase', 'contacts'],
     'data': [
+        'security/ir.model.access.csv',
         'views/sale.xml',
     ],
     'application': True,
@@ -1 +1,3 @@
-from . import sale
\ No newline at end of file
+from . import cache_version
+from . import sale
+from . import loyalty
@@ -0,0 +1,123 @@
+from odoo import api, fields, models
+
+
+class FuelCacheVersion(models.Model):
+    """
+    Transactional versions of the fuel station ormcaches.
+
+    A version is bumped by inserting a row from the writing transaction
+    right before it commits, so it changes exactly when the data behind it
+    becomes visible, and a reader gets the version and the data from the
+    same snapshot. Caches keyed on `_get_version` therefore never keep old
+    data under a new version, whatever order concurrent transactions
+    commit in. Rows are only ever inserted, so bumps never wait on each
+    other.
+    """
+    _name = "fuel.cache.version"
+    _description = "Fuel Cache Version"
+    _log_access = False
+
+    name = fields.Char(string="Cache", required=True, index=True)
+
+    # Names with more rows than this are compacted by the autovacuum
+    _GC_THRESHOLD = 1000
+
+    @api.model
+    def _bump(self, *names):
+        """ Change the versions of `names` when the current transaction commits. """
+        names = set(names) - {None, False}
+        if not names:
+            return
+        pending = self.env.cr.precommit.data.setdefault("fuel.cache.version", set())
+        if not pending:
+            self.env.cr.precommit.add(self._flush_bumps)
+        pending.update(names)
+
+    @api.model
+    def _flush_bumps(self):
+        names = self.env.cr.precommit.data.pop("fuel.cache.version", set())
+        if names:
+            self.env.cr.execute(
+                "INSERT INTO fuel_cache_version (name) SELECT unnest(%s::varchar[])",
+                [sorted(names)],
+            )
+
+    @api.model
+    def _get_version(self, names):
+        """
+        Combined version of `names`, or None while the current transaction
+        has uncommitted changes to them: such data must not be cached.
+        """
+        names = sorted(set(names))
+        if set(names) & self.env.cr.precommit.data.get("fuel.cache.version", set()):
+            return None
+        self.env.cr.execute("""
+            SELECT COUNT(*), MAX(id)
+              FROM fuel_cache_version
+             WHERE name = ANY(%s)
+        """, [names])
+        return self.env.cr.fetchone()
+
+    @api.autovacuum
+    def _gc_versions(self):
+        """
+        Replace the rows of busy names by a single new one. The new row's id
+        was never part of a version, so the compacted version is new too.
+        """
+        self.env.cr.execute("""
+            SELECT name
+              FROM fuel_cache_version
+          GROUP BY name
+            HAVING COUNT(*) > %s
+        """, [self._GC_THRESHOLD])
+        for name, in self.env.cr.fetchall():
+            self.env.cr.execute("""
+                WITH fresh AS (
+                    INSERT INTO fuel_cache_version (name) VALUES (%(name)s) RETURNING id
+                )
+                DELETE FROM fuel_cache_version
+                 WHERE name = %(name)s
+                   AND id < (SELECT id FROM fresh)
+            """, {"name": name})
+
+
+class FuelCacheVersionMixin(models.AbstractModel):
+    """
+    Bumps the cache versions fed by a model whenever its records are
+    created, deleted or written on one of `_cache_version_fields` (any
+    field when empty). `_get_cache_version_names` says which versions a
+    recordset feeds: the model name by default, date scoped names for
+    models whose caches are per day.
+    """
+    _name = "fuel.cache.version.mixin"
+    _description = "Fuel Cache Version Invalidation"
+
+    _cache_version_fields = ()
+
+    def _get_cache_version_names(self):
+        return {self._name} if self else set()
+
+    def _bump_cache_versions(self, names=()):
+        self.env["fuel.cache.version"]._bump(*names, *self._get_cache_version_names())
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records._bump_cache_versions()
+        return records
+
+    def write(self, vals):
+        if self._cache_version_fields and not set(self._cache_version_fields) & set(vals):
+            return super().write(vals)
+
+        # Versions of what the records feed before and after the write
+        names = self._get_cache_version_names()
+        res = super().write(vals)
+        self._bump_cache_versions(names)
+        return res
+
+    def unlink(self):
+        names = self._get_cache_version_names()
+        res = super().unlink()
+        self.env["fuel.cache.version"]._bump(*names)
+        return res
@@ -0,0 +1,37 @@
+from odoo import models
+
+
+class LoyaltyProgram(models.Model):
+    _name = "loyalty.program"
+    _inherit = ["loyalty.program", "fuel.cache.version.mixin"]
+
+    # Fields of the program domain and of the data cached per program
+    _cache_version_fields = (
+        'active', 'company_id', 'pricelist_ids', 'date_from', 'date_to',
+        'trigger', 'applies_on', 'rule_ids', 'reward_ids',
+    )
+
+
+class LoyaltyRule(models.Model):
+    _name = "loyalty.rule"
+    _inherit = ["loyalty.rule", "fuel.cache.version.mixin"]
+
+    _cache_version_fields = (
+        'active', 'program_id', 'minimum_qty', 'minimum_amount', 'minimum_amount_tax_mode',
+        'reward_point_mode', 'reward_point_amount',
+        'product_ids', 'product_category_id', 'product_tag_id', 'product_domain',
+    )
+
+    def _get_cache_version_names(self):
+        # One version for every program, rule and reward
+        return {"loyalty.program"} if self else set()
+
+
+class LoyaltyReward(models.Model):
+    _name = "loyalty.reward"
+    _inherit = ["loyalty.reward", "fuel.cache.version.mixin"]
+
+    _cache_version_fields = ('active', 'program_id', 'description', 'required_points', 'reward_type')
+
+    def _get_cache_version_names(self):
+        return {"loyalty.program"} if self else set()
@@ -1,7 +1,8 @@
-from odoo import api, fields, models, _
+from odoo import api, fields, models, tools, _
 from odoo.exceptions import ValidationError
+from odoo.osv import expression
 from odoo.addons.sale_loyalty.models.sale_order import SaleOrder as LoyaltySaleOrder
-from odoo.tools.float_utils import float_is_zero
+from odoo.tools.float_utils import float_is_zero, float_round
 
 class SaleOrder(models.Model):
     _inherit = "sale.order"
@@ -23,64 +24,297 @@ class SaleOrder(models.Model):
         )
 
         if loyalty_orders:
-            for order in self:
-                all_coupons = order.applied_coupon_ids | order.coupon_point_ids.coupon_id | order.order_line.coupon_id
-                if any(order._get_real_points_for_coupon(coupon) < 0 for coupon in all_coupons):
-                    raise ValidationError(_('One or more rewards on the sale order is invalid. Please check them.'))
-                order._update_programs_and_rewards()
-
-            reward_coupons = self.order_line.coupon_id
-            self.coupon_point_ids.filtered(
-                lambda pe: pe.coupon_id.program_id.applies_on == 'current' and pe.coupon_id not in reward_coupons
-            ).coupon_id.sudo().unlink()
-            # Add/remove the points to our coupons
-            for coupon, change in self.filtered(lambda s: s.state != 'sale')._get_point_changes().items():
-                coupon.points += change
-            self._send_reward_coupon_mail()
+            self._post_loyalty_batch()
 
         return super(LoyaltySaleOrder, self).action_confirm()
 
+    def _get_program_domain(self):
+        # Programs already searched for this order by _post_loyalty_batch
+        program_ids = getattr(self, '_fuel_loyalty_program_ids', None)
+        if program_ids is not None:
+            return [('id', 'in', program_ids)]
+        return super()._get_program_domain()
+
+    def _post_loyalty_batch(self):
+        """
+        Loyalty stage of action_confirm for many orders at once: programs are
+        searched once per distinct program domain, point changes are summed
+        per coupon and written with one UPDATE, and reward mails go out
+        together at the end.
+
+        The searched programs are kept on the order recordsets of this loop
+        only, so nothing outside the batch ever sees them.
+        """
+        program_ids = {}
+        for order in self:
+            domain = order._get_program_domain()
+            key = repr(domain)
+            if key not in program_ids:
+                program_ids[key] = self.env['loyalty.program'].search(domain).ids
+            order._fuel_loyalty_program_ids = program_ids[key]
+
+            all_coupons = order.applied_coupon_ids | order.coupon_point_ids.coupon_id | order.order_line.coupon_id
+            if any(order._get_real_points_for_coupon(coupon) < 0 for coupon in all_coupons):
+                raise ValidationError(_('One or more rewards on the sale order is invalid. Please check them.'))
+            order._update_programs_and_rewards()
+
+        reward_coupons = self.order_line.coupon_id
+        self.coupon_point_ids.filtered(
+            lambda pe: pe.coupon_id.program_id.applies_on == 'current' and pe.coupon_id not in reward_coupons
+        ).coupon_id.sudo().unlink()
+
+        # Add/remove the points to our coupons
+        changes = self.filtered(lambda s: s.state != 'sale')._get_point_changes()
+        self._apply_coupon_point_changes(changes)
+
+        self._send_reward_coupon_mail()
+
     @api.model
-    def get_loyalty_claimable_rewards(self, partner_id, product_id, qty):
+    def _apply_coupon_point_changes(self, changes):
         """
-        Return claimable rewards for a loyalty customer
+        Add {coupon: delta} to the coupon balances in a single grouped UPDATE.
+        The UPDATE skips the points tracking, so each coupon gets one chatter
+        note with its old and new balance instead.
         """
-        try:
-            qty = float(qty or 0)
-        except (TypeError, ValueError):
-            qty = 0
-
-        if not partner_id or not product_id or qty <= 0:
-            return []
-
-        order = self.with_context(from_fuel_station=True).create({
-            "partner_id": partner_id,
-            "order_line": [(0, 0, {
-                "product_id": product_id,
-                "product_uom_qty": qty,
-            })],
-            "is_fuel_sale": True,
-            "fuel_sale_type": "loyalty",
+        changes = {coupon: delta for coupon, delta in changes.items() if delta and coupon.id}
+        if not changes:
+            return
+
+        coupons = self.env['loyalty.card'].concat(*changes)
+        coupons.flush_recordset(['points'])
+        old_points = {coupon.id: coupon.points for coupon in coupons}
+        self.env.cr.execute("""
+            UPDATE loyalty_card card
+               SET points = card.points + delta.points,
+                   write_uid = %s,
+                   write_date = now() AT TIME ZONE 'UTC'
+              FROM unnest(%s::int[], %s::float8[]) AS delta(id, points)
+             WHERE card.id = delta.id
+        """, [self.env.uid, coupons.ids, [changes[coupon] for coupon in coupons]])
+        coupons.invalidate_recordset(['points', 'write_uid', 'write_date'])
+        coupons.modified(['points'])
+
+        coupons.sudo()._message_log_batch(bodies={
+            coupon.id: _(
+                "Points: %(old)s \u2192 %(new)s (%(delta)+g)",
+                old=old_points[coupon.id], new=coupon.points, delta=changes[coupon],
+            )
+            for coupon in coupons
         })
 
-        try:
-            order._update_programs_and_rewards()
-            claimable = order._get_claimable_rewards()
-
-            rewards = []
-            for coupon, reward_set in claimable.items():
-                for reward in reward_set:
-                    rewards.append({
-                        "id": reward.id,
-                        "name": reward.description,
-                        "required_points": reward.required_points,
-                        "coupon_id": coupon.id,
-                    })
-
-            return rewards
-
-        finally:
-            order.unlink()
+    @api.model
+    def get_loyalty_claimable_rewards(self, partner_id, product_id, qty, shift_key=None):
+        """
+        Return claimable rewards for a loyalty customer
+
+        Rewards are simulated from the loyalty programs and the partner's
+        loyalty cards without creating any sale order, so the lookup never
+        writes to the database. `shift_key` (default: today) scopes the
+        cached answers to the running shift.
+        """
+        return self.get_loyalty_claimable_rewards_batch(
+            [{'partner_id': partner_id, 'product_id': product_id, 'qty': qty}],
+            shift_key=shift_key,
+        )[0]
+
+    @api.model
+    def get_loyalty_claimable_rewards_batch(self, lines, shift_key=None):
+        """
+        Claimable rewards of many loyalty lines in one call.
+
+        lines: [{partner_id, product_id, qty}, ...] or [(partner_id, product_id, qty), ...]
+        Returns one reward list per line, in the same order. Card balances of
+        all partners are read in one query and program data is shared by
+        every line of the same product. Lines are priced like an order line
+        of the partner: pricelist price, taxes after the fiscal position.
+        """
+        shift_key = shift_key or str(fields.Date.context_today(self))
+
+        parsed = []
+        for line in lines:
+            if isinstance(line, dict):
+                line = (line.get('partner_id'), line.get('product_id'), line.get('qty'))
+            partner_id, product_id, qty = line
+            try:
+                qty = float(qty or 0)
+            except (TypeError, ValueError):
+                qty = 0
+            parsed.append((partner_id, product_id, qty) if partner_id and product_id and qty > 0 else None)
+
+        valid = [line for line in parsed if line]
+        if not valid:
+            return [[] for line in parsed]
+
+        partners = self.env['res.partner'].browse({partner_id for partner_id, __, __ in valid})
+        products = self.env['product.product'].browse({product_id for __, product_id, __ in valid})
+        cards = self._get_loyalty_card_points(partners.ids)
+        # Warm the prefetch of every partner and product at once
+        partners.mapped('property_product_pricelist')
+        products.mapped('uom_id.rounding')
+        products.mapped('taxes_id')
+        version = self.env['fuel.cache.version']._get_version(['loyalty.program'])
+
+        result = []
+        for line in parsed:
+            if not line:
+                result.append([])
+                continue
+            partner_id, product_id, qty = line
+            product = products.browse(product_id)
+            qty = float_round(qty, precision_rounding=product.uom_id.rounding or 0.01)
+            amount_untaxed, amount_total = self._get_loyalty_line_amounts(partners.browse(partner_id), product, qty)
+            args = (partner_id, product_id, qty, amount_untaxed, amount_total, cards.get(partner_id, ()))
+            if version is None:
+                rewards = self._compute_claimable_rewards(*args, version)
+            else:
+                rewards = self._get_cached_claimable_rewards(*args, shift_key, version)
+            result.append([dict(reward) for reward in rewards])
+        return result
+
+    @api.model
+    def _get_loyalty_line_amounts(self, partner, product, qty):
+        """ (untaxed, taxed) amount of `qty` of `product` on an order of `partner`. """
+        company = self.env.company
+        pricelist = partner.property_product_pricelist
+        price = pricelist._get_product_price(product, qty) if pricelist else product.lst_price
+        fiscal_position = self.env['account.fiscal.position'].with_company(company)._get_fiscal_position(partner)
+        taxes = fiscal_position.map_tax(product.taxes_id.filtered(lambda tax: tax.company_id == company))
+        currency = pricelist.currency_id or company.currency_id
+        amounts = taxes.compute_all(price, currency, qty, product=product, partner=partner)
+        return amounts['total_excluded'], amounts['total_included']
+
+    @api.model
+    @tools.ormcache('self.env.company.id', 'partner_id', 'product_id', 'qty', 'amount_untaxed', 'amount_total',
+                    'cards', 'shift_key', 'version')
+    def _get_cached_claimable_rewards(self, partner_id, product_id, qty, amount_untaxed, amount_total, cards,
+                                      shift_key, version):
+        """
+        Claimable rewards of one (partner, product, qty bucket) for the shift.
+        `cards` is the partner's (program, card, points) state, part of the
+        key so that earning or spending points never serves a stale answer;
+        `version` is the loyalty program version, which changes when a
+        program, rule or reward the simulation reads changes.
+        """
+        return self._compute_claimable_rewards(
+            partner_id, product_id, qty, amount_untaxed, amount_total, cards, version,
+        )
+
+    @api.model
+    def _compute_claimable_rewards(self, partner_id, product_id, qty, amount_untaxed, amount_total, cards, version):
+        partner = self.env['res.partner'].browse(partner_id)
+        args = (
+            self.env.company.id,
+            partner.property_product_pricelist.id,
+            str(fields.Date.context_today(self)),
+            product_id,
+        )
+        if version is None:
+            programs = self._read_loyalty_program_data(*args)
+        else:
+            programs = self._get_loyalty_program_data(*args, version)
+        return self._simulate_claimable_rewards(programs, cards, qty, amount_untaxed, amount_total)
+
+    @api.model
+    def _get_loyalty_card_points(self, partner_ids):
+        """ {partner_id: ((program_id, card_id, points), ...)} of the partners' unexpired loyalty cards. """
+        self.env['loyalty.card'].flush_model(['partner_id', 'program_id', 'points', 'expiration_date'])
+        self.env.cr.execute("""
+            SELECT partner_id, program_id, id, points
+              FROM loyalty_card
+             WHERE partner_id = ANY(%s)
+               AND (expiration_date IS NULL OR expiration_date >= %s)
+          ORDER BY partner_id, program_id, id
+        """, [list(partner_ids), fields.Date.context_today(self)])
+        cards = {}
+        for partner_id, program_id, card_id, points in self.env.cr.fetchall():
+            cards.setdefault(partner_id, []).append((program_id, card_id, points))
+        return {partner_id: tuple(rows) for partner_id, rows in cards.items()}
+
+    @api.model
+    @tools.ormcache('company_id', 'pricelist_id', 'date', 'product_id', 'version')
+    def _get_loyalty_program_data(self, company_id, pricelist_id, date, product_id, version):
+        return self._read_loyalty_program_data(company_id, pricelist_id, date, product_id)
+
+    @api.model
+    def _read_loyalty_program_data(self, company_id, pricelist_id, date, product_id):
+        """
+        Automatic loyalty programs running on `date`, reduced to the plain
+        data the reward simulation needs for `product_id`:
+        ((program_id, applies_on, rules, rewards), ...) where rules only
+        keep the rules the product satisfies.
+        """
+        # In-memory order, only used to build the standard program domain
+        order = self.new({'company_id': company_id, 'pricelist_id': pricelist_id})
+        domain = expression.AND([order._get_program_domain(), [('trigger', '=', 'auto')]])
+        programs = self.env['loyalty.program'].search(domain)
+        product = self.env['product.product'].browse(product_id)
+
+        data = []
+        for program in programs:
+            rules = tuple(
+                (rule.minimum_qty, rule.minimum_amount, rule.minimum_amount_tax_mode,
+                 rule.reward_point_mode, rule.reward_point_amount)
+                for rule in program.rule_ids
+                if product.filtered_domain(rule._get_valid_product_domain())
+            )
+            rewards = tuple(
+                (reward.id, reward.description, reward.required_points, reward.reward_type)
+                for reward in program.reward_ids
+            )
+            data.append((program.id, program.applies_on, rules, rewards))
+        return tuple(data)
+
+    @api.model
+    def _simulate_claimable_rewards(self, programs, cards, qty, amount_untaxed, amount_total):
+        """
+        Mirror of `_get_claimable_rewards` for a one-line order of `qty` worth
+        `amount_untaxed` before and `amount_total` after taxes, computed from
+        plain data: the points a program would grant plus, for programs
+        applying on the current order, the partner's card balance. As in
+        sale_loyalty, minimum amounts follow the rule's tax mode and points
+        per money spent count the taxed amount.
+        """
+        card_by_program = {program_id: (card_id, points) for program_id, card_id, points in cards}
+
+        rewards = []
+        for program_id, applies_on, rules, program_rewards in programs:
+            if applies_on == 'future':
+                # Points earned now are only spendable on a later order
+                continue
+
+            earned = 0.0
+            matched = False
+            for minimum_qty, minimum_amount, tax_mode, mode, point_amount in rules:
+                amount = amount_total if tax_mode == 'incl' else amount_untaxed
+                if qty < (minimum_qty or 0) or amount < (minimum_amount or 0):
+                    continue
+                matched = True
+                if mode == 'order':
+                    earned += point_amount
+                elif mode == 'money':
+                    earned += point_amount * amount_total
+                elif mode == 'unit':
+                    earned += point_amount * qty
+
+            card_id, card_points = card_by_program.get(program_id, (False, 0.0))
+            if applies_on == 'both':
+                points = card_points + earned
+            elif matched:
+                points = earned
+            else:
+                continue
+
+            for reward_id, description, required_points, reward_type in program_rewards:
+                if reward_type == 'discount' and float_is_zero(amount_total, precision_digits=2):
+                    continue
+                if points >= required_points:
+                    rewards.append((
+                        ('id', reward_id),
+                        ('name', description),
+                        ('required_points', required_points),
+                        ('coupon_id', card_id),
+                    ))
+        return tuple(rewards)
 
     def apply_loyalty_reward(self, reward_id):
         self.ensure_one()